@@ -0,0 +1,171 @@
+from flask import Blueprint, jsonify, request
+from db import db, Players, Rankings
+from services import getPlayersOfRanking, getActiveMatchesOfRanking
+from headToHead import getOpponents
+from authentication import requiresViewerApi
+from logger import log
+import base64
+import datetime as dt
+
+# =============================================================================
+# JSON READ API (v1)
+# =============================================================================
+# Read-only endpoints for scoreboards and hardware clients.
+# List endpoints take:
+#   limit   number of items per page (default 50, max 200)
+#   cursor  opaque value of nextCursor from the previous page
+#   fields  comma separated list of fields to return, e.g. fields=id,name,points
+# and answer with {"data": [...], "nextCursor": "..." or null}.
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+RANKING_FIELDS = ["id", "name", "description", "sortedBy", "tournament", "typeTournament", "endsOn", "ended"]
+RANKED_PLAYER_FIELDS = ["id", "name", "position", "ranking", "points", "lastRanking", "lastPoints", "lastRankingChanged",
+                        "wins", "losses", "setsWon", "setsLost", "rating", "ratingDeviation"]
+PLAYER_FIELDS = ["id", "name", "wins", "losses", "setsWon", "setsLost"]
+HEAD_TO_HEAD_FIELDS = ["opponentId", "opponent", "wins", "losses", "setsWon", "setsLost", "lastPlayed"]
+MATCH_FIELDS = ["id", "challenger", "challengerId", "challengerBonus", "defender", "defenderId", "defenderBonus", "timeStarted", "rankingId"]
+
+class ApiError(Exception):
+    """
+    Error that is returned to the client as JSON with the given status code.
+    """
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+@api.errorhandler(ApiError)
+def handleApiError(error):
+    return jsonify({"error": error.message}), error.status
+
+def encodeCursor(value):
+    return base64.urlsafe_b64encode(str(value).encode()).decode().rstrip("=")
+
+def decodeCursor(cursor):
+    """
+    Returns the integer stored in a cursor, or None if no cursor was given.
+    """
+    if not cursor:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError("Invalid cursor")
+
+def getLimit():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError("limit must be an integer")
+    return max(1, min(limit, MAX_LIMIT))
+
+def getFields(allowedFields):
+    """
+    Returns the fields requested with the fields parameter, or all allowed fields.
+    """
+    requested = request.args.get('fields')
+    if not requested:
+        return allowedFields
+    fields = [field.strip() for field in requested.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowedFields]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowedFields)}")
+    return fields
+
+def serialize(obj, fields):
+    output = {}
+    for field in fields:
+        value = getattr(obj, field, None)
+        if isinstance(value, dt.datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=dt.timezone.utc)  # Stored as UTC
+            value = value.isoformat()
+        output[field] = value
+    return output
+
+def getRankingOr404(rankingId):
+    ranking = db.session.get(Rankings, rankingId)
+    if not ranking:
+        raise ApiError(f"Ranking {rankingId} does not exist", 404)
+    return ranking
+
+def paginateQuery(query, idColumn, fields):
+    """
+    Keyset pagination over a query ordered by idColumn.
+    """
+    limit = getLimit()
+    after = decodeCursor(request.args.get('cursor'))
+    if after is not None:
+        query = query.filter(idColumn > after)
+    items = query.order_by(idColumn.asc()).limit(limit + 1).all()
+    nextCursor = encodeCursor(items[limit - 1].id) if len(items) > limit else None
+    return jsonify({"data": [serialize(item, fields) for item in items[:limit]], "nextCursor": nextCursor})
+
+def paginateList(items, fields):
+    """
+    Cursor pagination over an already ordered list, the cursor is the position in the list.
+    """
+    limit = getLimit()
+    start = max(0, decodeCursor(request.args.get('cursor')) or 0)
+    page = items[start:start + limit]
+    nextCursor = encodeCursor(start + limit) if start + limit < len(items) else None
+    return jsonify({"data": [serialize(item, fields) for item in page], "nextCursor": nextCursor})
+
+@api.route('/rankings')
+@requiresViewerApi
+def apiRankings():
+    return paginateQuery(Rankings.query, Rankings.id, getFields(RANKING_FIELDS))
+
+@api.route('/rankings/<int:rankingId>')
+@requiresViewerApi
+def apiRanking(rankingId):
+    return jsonify({"data": serialize(getRankingOr404(rankingId), getFields(RANKING_FIELDS))})
+
+@api.route('/rankings/<int:rankingId>/players')
+@requiresViewerApi
+def apiPlayersOfRanking(rankingId):
+    """
+    Players of a ranking in ranking order. position is the place in that order,
+    which differs from ranking for rankings sorted by points or rating.
+    """
+    getRankingOr404(rankingId)
+    fields = getFields(RANKED_PLAYER_FIELDS)
+    players = getPlayersOfRanking(rankingId)
+    log(1, "apiPlayersOfRanking", f"Served {len(players)} players of ranking {rankingId}")
+    return paginateList(players, fields)
+
+@api.route('/rankings/<int:rankingId>/matches')
+@requiresViewerApi
+def apiMatchesOfRanking(rankingId):
+    getRankingOr404(rankingId)
+    return paginateList(getActiveMatchesOfRanking(rankingId), getFields(MATCH_FIELDS))
+
+@api.route('/players')
+@requiresViewerApi
+def apiPlayers():
+    return paginateQuery(Players.query, Players.id, getFields(PLAYER_FIELDS))
+
+@api.route('/players/<int:playerId>')
+@requiresViewerApi
+def apiPlayer(playerId):
+    player = db.session.get(Players, playerId)
+    if not player:
+        raise ApiError(f"Player {playerId} does not exist", 404)
+    return jsonify({"data": serialize(player, getFields(PLAYER_FIELDS))})
+
+@api.route('/rankings/<int:rankingId>/players/<int:playerId>/headtohead')
+@requiresViewerApi
+def apiHeadToHead(rankingId, playerId):
+    """
+    Record of a player against every opponent in a ranking, most played first.
+    """
+    getRankingOr404(rankingId)
+    fields = getFields(HEAD_TO_HEAD_FIELDS)
+    records = []
+    for record, opponentName in getOpponents(playerId, rankingId):
+        record.opponent = opponentName  # Not a column, only set for serializing
+        records.append(record)
+    return paginateList(records, fields)
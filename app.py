@@ -1,25 +1,41 @@
 #flask
-from flask import Flask, render_template, request, redirect, session, flash
+from flask import Flask, render_template, request, redirect, session, flash, jsonify, Response
 from flask_migrate import Migrate
 
 #Database
-from db import db, Players, PlayerBonuses, Rankings, PlayerRankings, Authentication, OnGoingMatches
+from db import db, Players, PlayerBonuses, Rankings, PlayerRankings, Authentication, OnGoingMatches, getEngineOptions, getSqlitePragmas, applySqliteProfile
 
 #DreamRankr files
 from bonuses import updateOrCreatePlayerBonus, validateBonusParameters
-from services import getActiveMatchesOfRanking, getPlayersOfRanking, newPlayer, addPlayerToRanking, startMatch, endMatch, removePlayerFromRanking, deletePlayer, updatePlayerRanking, updatePlayerAttributes, startList, endList, deleteList, clearLogs, checkBeforeRendering
+from services import getActiveMatchesOfRanking, getPlayersOfRanking, newPlayer, addPlayerToRanking, startMatch, endMatch, endMatches, removePlayerFromRanking, deletePlayer, updatePlayerRanking, updatePlayerAttributes, startList, endList, deleteList, clearLogs, scheduleRankingEnd, scheduleAllRankingEnds, scheduleLogRetention, validateSortingOption
 from repairs import checkRankingAndFix
+from indexes import createMissingIndexes, addMissingColumns
 from authentication import requiresViewer, requiresTrainer, authenticate
 from markdownUtils import getMarkDownContent, changeMarkDown
-from logger import log
+from api import api
+from logger import log, startLogWriter
+from scheduler import startScheduler
+from rankingVersions import BOOT_ID, markRankingChanged, getRankingVersion, getGlobalVersion
+from live import subscribe, streamEvents, publishEvent
+from pageCache import getPageCacheKey, getCachedPage, storeCachedPage
+from leaderboard import getLeaderboard, rebuildLifetimeStats
+from headToHead import getRecentForms, getHeadToHeadOfMatches, rebuildHeadToHead, createHeadToHeadTables
+from ratings import replayRatings
+from instrumentation import initInstrumentation, getInstrumentationStats
+from metrics import incrementCounter, renderMetrics
+from logSearch import createLogSearchIndex, getLogFilters, searchLogs, streamLogExport, isFullTextSearchAvailable, LOG_LEVELS
+from dataExport import EXPORT_FORMATS, parseDateArg, createExportResponse, streamStandings, streamMatches, streamLifetimeStats
 from dotenv import load_dotenv, set_key
 
 #Third party libaries
 from datetime import datetime, timezone, timedelta
+from functools import wraps
 import datetime as dt
 import os
 from werkzeug.security import generate_password_hash
 import zoneinfo
+import click
+import hmac
 
 # Load existing .env file
 load_dotenv()
@@ -77,11 +93,56 @@ def convert_utc_to_local(utc_datetime):
         utc_datetime = utc_datetime.replace(tzinfo=dt.timezone.utc)
     return utc_datetime.astimezone(LOCAL_TZ)
 
+def conditionalPage(useGlobalVersion=False):
+    """
+    Answers GET requests for a ranking page with 304 Not Modified when the client already
+    has the current version, without loading any data or rendering the template.
+    The ETag contains the data version, the permission level (pages differ per level) and
+    the current hour, because the templates show "days left" and "changed x hours ago".
+    Args:
+        useGlobalVersion: Use the version over all rankings, for pages that also show
+                          players and data of other rankings (trainer page)
+    Returns:
+        Decorator for routes with a rankingId argument
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(rankingId, *args, **kwargs):
+            # Pending flash messages must be rendered once, never answer those requests from cache
+            if '_flashes' in session:
+                return f(rankingId, *args, **kwargs)
+            version, lastModified = getGlobalVersion() if useGlobalVersion else getRankingVersion(rankingId)
+            now = datetime.now(timezone.utc)
+            etag = f"{BOOT_ID}-{version}-{session.get('permissionLevel')}-{now:%Y%m%d%H}"
+            lastModified = max(lastModified, now.replace(minute=0, second=0, microsecond=0))
+            if request.if_none_match:
+                notModified = request.if_none_match.contains(etag)
+            else:
+                notModified = request.if_modified_since is not None and request.if_modified_since >= lastModified
+            if notModified:
+                response = Response(status=304)
+            else:
+                response = app.make_response(f(rankingId, *args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = lastModified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
 # =============================================================================
 
 # Initialize Flask application with database configuration
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///Main.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///Main.db')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = getEngineOptions(app.config['SQLALCHEMY_DATABASE_URI'])
+# Logs are kept in their own database so they don't compete for the ranking database's write lock
+logDatabaseUri = os.environ.get('LOG_DATABASE_URL', 'sqlite:///Logs.db')
+app.config['SQLALCHEMY_BINDS'] = {
+    'logs': {'url': logDatabaseUri, **getEngineOptions(logDatabaseUri)}
+}
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 app.secret_key = os.environ.get('SECRET_KEY')
@@ -94,7 +155,20 @@ if not app.secret_key:
 app.permanent_session_lifetime = timedelta(days=14)  # 30 minute timeout
 
 db.init_app(app)
+with app.app_context():
+    applySqliteProfile(db.engines[None], getSqlitePragmas())
+    applySqliteProfile(db.engines['logs'], getSqlitePragmas(os.environ.get('LOG_DB_PROFILE')))
+    # The log database is not managed by migrations, create its table if it is missing
+    db.create_all(bind_key='logs')
+    createLogSearchIndex()
 migrate = Migrate(app, db)
+app.register_blueprint(api)
+initInstrumentation(app)
+startLogWriter(app)
+startScheduler(app)
+with app.app_context():
+    scheduleAllRankingEnds()
+    scheduleLogRetention()
 app.jinja_env.globals['now'] = datetime.utcnow
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -103,8 +177,8 @@ def login():
         return render_template('login.html')
     elif request.method == 'POST':
         password = request.form.get('password')
-        print(password)
-        if authenticate(password, request):
+        realm = request.form.get('realm') or None
+        if authenticate(password, request, realm):
             flash(f"Logged in as {session['permissionLevel']}", "success")
             return redirect('/')
         else:
@@ -132,7 +206,6 @@ def showPrivacyTerms():
 
 @app.route('/')
 @requiresViewer
-@checkBeforeRendering
 def home():
     """
     Renders the home page displaying all available rankings.
@@ -144,6 +217,11 @@ def home():
     Raises:
         Exception: Logs error if database query fails
     """
+    cacheKey = getPageCacheKey('index.html', None, getGlobalVersion()[0])
+    cachedPage = getCachedPage(cacheKey)
+    if cachedPage is not None:
+        return cachedPage
+
     try:
         rankings = Rankings.query.all()
     except Exception as e:
@@ -153,17 +231,18 @@ def home():
         return render_template('index.html', rankings=[], allPlayers=[])
     
     try:
-        allPlayers = Players.query.order_by(Players.wins.desc()).all()
+        # Pre-sorted top of the lifetime leaderboard with precomputed ratios
+        allPlayers, totalPlayers = getLeaderboard()
     except Exception as e:
         log(4, "home", f"Error loading players for home page: {e}")
         flash("Can not show the rankings at the moment", "error")
         # Return empty rankings list as fallback
         return render_template('index.html', rankings=rankings, allPlayers=[])
-    return render_template('index.html', rankings=rankings, allPlayers=allPlayers)
+    return storeCachedPage(cacheKey, render_template('index.html', rankings=rankings, allPlayers=allPlayers, totalPlayers=totalPlayers))
 
 @app.route('/view/<int:rankingId>')
 @requiresViewer
-@checkBeforeRendering
+@conditionalPage()
 def view(rankingId):
     """
     Renders the viewer page for a specific ranking.
@@ -178,10 +257,18 @@ def view(rankingId):
     Raises:
         Exception: Logs error if ranking data cannot be retrieved
     """
+    cacheKey = getPageCacheKey('viewer.html', rankingId, getRankingVersion(rankingId)[0])
+    cachedPage = getCachedPage(cacheKey)
+    if cachedPage is not None:
+        return cachedPage
+
     try:
+        ranking = db.session.get(Rankings, rankingId)
         players = getPlayersOfRanking(rankingId)
         log(1, "view", f"Successfully loaded {len(players)} players for ranking {rankingId}")
-        return render_template('viewer.html', players=players, ranking=db.session.get(Rankings, rankingId))
+        html = render_template('viewer.html', players=players, ranking=ranking, recentForms=getRecentForms(rankingId))
+        # Unknown rankings are not cached, they would only fill the cache
+        return storeCachedPage(cacheKey, html) if ranking else html
     except Exception as e:
         log(4, "view", f"Error loading players for ranking {rankingId}: {e}")
         flash("Can not show the players at the moment", "error")
@@ -190,7 +277,7 @@ def view(rankingId):
 
 @app.route('/trainer/<int:rankingId>')
 @requiresTrainer
-@checkBeforeRendering
+@conditionalPage(useGlobalVersion=True)
 def trainer(rankingId):
     """
     Renders the trainer page for managing a specific ranking.
@@ -209,14 +296,20 @@ def trainer(rankingId):
         players = getPlayersOfRanking(rankingId)
         ranking = db.session.get(Rankings, rankingId)
         
-        for player in players:
-            try:
-                player.bonus = PlayerBonuses.query.filter_by(playerId=player.id).first()
-            except Exception as e:
-                log(3, "trainer", f"Error loading bonus for player {player.id}: {e}")
-                player.bonus = None
+        try:
+            # Load all bonuses of the shown players at once instead of one query per player
+            playerIds = [player.id for player in players]
+            bonuses = {}
+            for bonus in PlayerBonuses.query.filter(PlayerBonuses.playerId.in_(playerIds)).all():
+                bonuses.setdefault(bonus.playerId, bonus)
+            for player in players:
+                player.bonus = bonuses.get(player.id)
+        except Exception as e:
+            log(3, "trainer", f"Error loading bonuses for ranking {rankingId}: {e}")
         
         activeMatches = getActiveMatchesOfRanking(rankingId)
+        headToHead = getHeadToHeadOfMatches(activeMatches)
+        recentForms = getRecentForms(rankingId)
         
         allPlayers = Players.query.all()
         
@@ -227,7 +320,9 @@ def trainer(rankingId):
                              activeMatches=activeMatches, 
                              rankingId=rankingId,
                              ranking=ranking, 
-                             allPlayers=allPlayers)
+                             allPlayers=allPlayers,
+                             headToHead=headToHead,
+                             recentForms=recentForms)
                              
     except Exception as e:
         log(4, "trainer", f"Error loading trainer page for ranking {rankingId}: {e}")
@@ -237,7 +332,31 @@ def trainer(rankingId):
                              players=[], 
                              activeMatches=[], 
                              rankingId=rankingId, 
-                             allPlayers=[])
+                             allPlayers=[],
+                             headToHead={},
+                             recentForms={})
+
+@app.route('/live/<int:rankingId>')
+@requiresViewer
+def liveFeed(rankingId):
+    """
+    Server-Sent Events stream of a ranking, used by the viewer and trainer pages to update in place.
+    See live.py for the events.
+    
+    Args:
+        rankingId: ID of the ranking to follow
+        
+    Returns:
+        text/event-stream response, or 503 if too many connections are open
+    """
+    subscriberQueue = subscribe(rankingId)
+    if subscriberQueue is None:
+        log(2, "liveFeed", f"Refused live connection for ranking {rankingId}, too many open connections")
+        return Response("Too many live connections", status=503, headers={'Retry-After': '60'})
+    response = Response(streamEvents(rankingId, subscriberQueue), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep reverse proxies from buffering the stream
+    return response
 
 @app.route('/trainer/editMarkDown/<contentId>', methods=['GET', 'POST'])
 @requiresTrainer
@@ -315,7 +434,6 @@ def endListTrainer():
 
 @app.route('/trainer/settings', methods=['GET', 'POST'])
 @requiresTrainer
-@checkBeforeRendering
 def selectSettingsTrainer():
     return render_template(
             'selectRankingForSettings.html',
@@ -325,7 +443,6 @@ def selectSettingsTrainer():
 
 @app.route('/trainer/settings/<int:rankingId>', methods=['GET', 'POST'])
 @requiresTrainer
-@checkBeforeRendering
 def settingsTrainer(rankingId):
     if request.method == 'POST':
         # Parse form arguments correctly based on the HTML form fields
@@ -338,6 +455,9 @@ def settingsTrainer(rankingId):
             ranking = db.session.get(Rankings, rankingId)
             if ranking and (rankingSystem or autoEndDate or autoEndTime or disableAutoEnd):
                 if rankingSystem:
+                    if not validateSortingOption(rankingSystem):
+                        flash("Invalid ranking system", "error")
+                        return redirect(f'/trainer/settings/{rankingId}')
                     ranking.sortedBy = rankingSystem
                 
                 if disableAutoEnd:
@@ -362,6 +482,9 @@ def settingsTrainer(rankingId):
                         return redirect(f'/trainer/settings/{rankingId}')
                 
                 db.session.commit()
+                markRankingChanged(rankingId)
+                publishEvent(rankingId, "reload")
+                scheduleRankingEnd(rankingId, ranking.endsOn)
                 flash("Saved settings", "success")
         
         return redirect(f'/trainer/settings/{rankingId}')
@@ -391,6 +514,144 @@ def settingsTrainer(rankingId):
         flash("Can not show the ranking at the moment", "error")
         return redirect('/trainer/settings')
 
+@app.route('/trainer/stats')
+@requiresTrainer
+def instrumentationStats():
+    """
+    Per-route query counts and timings collected by the instrumentation, `?reset=1` starts a new period.
+    """
+    return jsonify(getInstrumentationStats(reset=request.args.get('reset') == '1'))
+
+def getUtcLogFilters(args):
+    """
+    Reads the log filters of a request, since and until are entered in local time.
+
+    Raises:
+        ValueError: If a filter has an invalid value
+    """
+    filters = getLogFilters(args)
+    for name in ("since", "until"):
+        if filters[name]:
+            filters[name] = convert_local_to_utc(filters[name]).replace(tzinfo=None)
+    return filters
+
+@app.route('/trainer/logs')
+@requiresTrainer
+def logsTrainer():
+    """
+    Log browser, newest entries first. Filters by level, origin, message text and
+    time range (query parameters), `cursor` pages to older entries.
+    """
+    try:
+        filters = getUtcLogFilters(request.args)
+        rows, nextCursor = searchLogs(filters, request.args.get('cursor'))
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect('/trainer/logs')
+    except Exception as e:
+        log(4, "logsTrainer", f"Error searching logs: {e}")
+        flash("Can not show the logs at the moment", "error")
+        return redirect('/trainer/settings')
+    entries = [
+        {"timestamp": convert_utc_to_local(row.timestamp) if row.timestamp else None, "level": row.level,
+         "origin": row.origin, "message": row.message}
+        for row in rows
+    ]
+    filterArgs = {name: request.args[name] for name in ("level", "origin", "text", "since", "until") if request.args.get(name)}
+    return render_template(
+        'logs.html',
+        entries=entries,
+        nextCursor=nextCursor,
+        filterArgs=filterArgs,
+        levels=LOG_LEVELS,
+        fullTextSearch=isFullTextSearchAvailable()
+    )
+
+@app.route('/trainer/logs/export')
+@requiresTrainer
+def exportLogsTrainer():
+    """
+    Streams all log entries matching the filters of the log browser, oldest first,
+    as NDJSON (`format=ndjson`, default) or CSV (`format=csv`). Times are in UTC.
+    """
+    exportFormat = request.args.get('format', 'ndjson')
+    if exportFormat not in EXPORT_FORMATS:
+        return Response("format must be ndjson or csv\n", status=400, mimetype='text/plain')
+    try:
+        filters = getUtcLogFilters(request.args)
+    except ValueError as e:
+        return Response(f"{e}\n", status=400, mimetype='text/plain')
+    # The generator runs after the request context is gone, hand it the engine
+    return createExportResponse(streamLogExport(db.engines['logs'], filters, exportFormat), exportFormat, "logs")
+
+@app.route('/trainer/export/<int:rankingId>/standings')
+@requiresTrainer
+def exportStandingsTrainer(rankingId):
+    """
+    Streams the standings of a ranking in ranking order as CSV (`format=csv`, default) or NDJSON.
+    """
+    exportFormat = request.args.get('format', 'csv')
+    if exportFormat not in EXPORT_FORMATS:
+        return Response("format must be csv or ndjson\n", status=400, mimetype='text/plain')
+    ranking = db.session.get(Rankings, rankingId)
+    if not ranking:
+        return Response(f"Ranking {rankingId} does not exist\n", status=404, mimetype='text/plain')
+    try:
+        chunks = streamStandings(db.engines[None], rankingId, ranking.sortedBy, exportFormat)
+    except ValueError as e:
+        log(4, "exportStandingsTrainer", f"Can not export ranking {rankingId}: {e}")
+        return Response(f"{e}\n", status=500, mimetype='text/plain')
+    log(1, "exportStandingsTrainer", "Exporting standings of ranking {}", rankingId)
+    return createExportResponse(chunks, exportFormat, f"standings-{rankingId}")
+
+@app.route('/trainer/export/matches')
+@requiresTrainer
+def exportMatchesTrainer():
+    """
+    Streams finished matches, oldest first, as CSV (`format=csv`, default) or NDJSON.
+    `rankingId` limits them to one ranking, `since` and `until` (local time, ISO) to a period.
+    """
+    exportFormat = request.args.get('format', 'csv')
+    if exportFormat not in EXPORT_FORMATS:
+        return Response("format must be csv or ndjson\n", status=400, mimetype='text/plain')
+    rankingId = request.args.get('rankingId', type=int)
+    try:
+        since, until = (parseDateArg(request.args.get(name), name) for name in ("since", "until"))
+    except ValueError as e:
+        return Response(f"{e}\n", status=400, mimetype='text/plain')
+    since = convert_local_to_utc(since).replace(tzinfo=None) if since else None
+    until = convert_local_to_utc(until).replace(tzinfo=None) if until else None
+    log(1, "exportMatchesTrainer", "Exporting matches of ranking {} from {} until {}", rankingId, since, until)
+    chunks = streamMatches(db.engines[None], exportFormat, rankingId, since, until)
+    return createExportResponse(chunks, exportFormat, f"matches-{rankingId}" if rankingId else "matches")
+
+@app.route('/trainer/export/lifetime')
+@requiresTrainer
+def exportLifetimeStatsTrainer():
+    """
+    Streams the lifetime stats of all players in leaderboard order as CSV (`format=csv`, default) or NDJSON.
+    """
+    exportFormat = request.args.get('format', 'csv')
+    if exportFormat not in EXPORT_FORMATS:
+        return Response("format must be csv or ndjson\n", status=400, mimetype='text/plain')
+    return createExportResponse(streamLifetimeStats(db.engines[None], exportFormat), exportFormat, "lifetime-stats")
+
+@app.route('/metrics')
+def metricsEndpoint():
+    """
+    Counters and gauges in the Prometheus text format. Scrapers authenticate with
+    `Authorization: Bearer <METRICS_TOKEN>`, without a configured token only logged in trainers get them.
+    """
+    metricsToken = os.environ.get('METRICS_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    if metricsToken:
+        allowed = hmac.compare_digest(authorization.encode(), f"Bearer {metricsToken}".encode())
+    else:
+        allowed = session.get('authenticated') and session.get('permissionLevel') == 'trainer'
+    if not allowed:
+        return Response("Unauthorized\n", status=401, mimetype='text/plain')
+    return Response(renderMetrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/trainer/fix', methods=['POST'])
 @requiresTrainer
 def fixRankingTrainer():
@@ -485,6 +746,9 @@ def finish_match():
             match = db.session.get(OnGoingMatches, matchId)
             db.session.delete(match)
             db.session.commit()
+            incrementCounter("dreamrankr_matches_cancelled_total", (("ranking", str(rankingId)),))
+            markRankingChanged(rankingId)
+            publishEvent(rankingId, "matchFinished", {"matchId": int(matchId), "cancelled": True})
             return redirect(f'/trainer/{rankingId}')
         
         # Validate required parameters
@@ -521,6 +785,37 @@ def finish_match():
     
     return redirect(f'/trainer/{rankingId}')
 
+@app.route('/trainer/finish_matches', methods=['POST'])
+@requiresTrainer
+def finish_matches():
+    """
+    Completes a batch of ongoing matches in one request and one transaction.
+    Matches are settled in the order they were started.
+    
+    JSON Body:
+        rankingId: Only accept matches of this ranking (optional)
+        results: List of objects with match_id and either winner_id or
+                 challenger_score and defender_score
+        
+    Returns:
+        JSON report with one status entry per submitted result
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('results'), list):
+        log(3, "finish_matches", "Request body is not a JSON object with a results list")
+        return jsonify({"error": "Expected a JSON object with a 'results' list"}), 400
+
+    rankingId = data.get('rankingId')
+    try:
+        rankingId = int(rankingId) if rankingId is not None else None
+    except (ValueError, TypeError):
+        return jsonify({"error": "rankingId must be an integer"}), 400
+
+    report = endMatches(data['results'], rankingId)
+    finishedCount = sum(1 for item in report if item["status"] == "finished")
+    log(1, "finish_matches", f"Finished {finishedCount} of {len(report)} submitted matches")
+    return jsonify({"finished": finishedCount, "failed": len(report) - finishedCount, "results": report})
+
 @app.route('/trainer/player_add', methods=['POST'])
 @requiresTrainer
 def player_add():
@@ -837,6 +1132,43 @@ def player_delete():
     
     return redirect(f'/trainer/{rankingId}')
 
+@app.cli.command('rebuild-lifetime-stats')
+def rebuildLifetimeStatsCommand():
+    """
+    Recomputes lifetime wins, losses and sets of all players from the finished matches: `flask rebuild-lifetime-stats`
+    """
+    updated = rebuildLifetimeStats()
+    if updated is None:
+        print("Could not rebuild lifetime stats, see logs")
+    else:
+        print(f"Rebuilt lifetime stats of {updated} players")
+        markRankingChanged()
+
+@app.cli.command('rebuild-head-to-head')
+def rebuildHeadToHeadCommand():
+    """
+    Recomputes all head-to-head records and recent forms from the finished matches: `flask rebuild-head-to-head`
+    """
+    processed = rebuildHeadToHead()
+    if processed is None:
+        print("Could not rebuild head-to-head records, see logs")
+    else:
+        print(f"Rebuilt head-to-head records from {processed} finished matches")
+        markRankingChanged()
+
+@app.cli.command('replay-ratings')
+@click.option('--ranking', 'rankingId', type=int, default=None, help='Only replay this ranking')
+def replayRatingsCommand(rankingId):
+    """
+    Recomputes the ratings of all rankings, or of one, from the finished matches: `flask replay-ratings`
+    """
+    replayed = replayRatings(rankingId)
+    if replayed is None:
+        print("Could not replay ratings, see logs")
+    else:
+        print(f"Replayed {replayed} finished matches")
+        markRankingChanged(rankingId)
+
 if __name__ == '__main__':
     """
     Application entry point that initializes the database and starts the Flask development server.
@@ -845,6 +1177,15 @@ if __name__ == '__main__':
     try:
         with app.app_context(): #TODO make better setup
 
+            # Add columns declared in db.py to databases created before they existed,
+            # ratings added to existing rankings start from their match history
+            if "player_rankings.rating" in addMissingColumns():
+                replayRatings()
+            # Add indexes declared in db.py to databases created before they existed
+            createMissingIndexes()
+            # Create and fill the head-to-head tables for databases created before they existed
+            createHeadToHeadTables()
+
             trainerEntry = Authentication.query.filter_by(name="trainer").first()
             if not trainerEntry:
                 password = os.environ.get('trainerPassword')
@@ -1,9 +1,16 @@
 from functools import wraps
-from flask import redirect, session, url_for
+from flask import redirect, session, url_for, flash, jsonify
 from db import Authentication
 from werkzeug.security import check_password_hash
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import hashlib
+import hmac
+import os
+import threading
+import time
 from logger import log
+from metrics import incrementCounter
 
 def requiresViewer(f):
     @wraps(f)
@@ -35,27 +42,161 @@ def requiresTrainer(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def authenticate(password, request):
+def requiresViewerApi(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Same check as requiresViewer, but answers API clients with 401 instead of a redirect
+        permissionLevel = session.get('permissionLevel')
+        if not session.get('authenticated') or permissionLevel not in ('viewer', 'trainer'):
+            return jsonify({"error": "Authentication required"}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+# =============================================================================
+# LOGIN HARDENING
+# =============================================================================
+# Password hashes are deliberately expensive, so the login flow bounds how much
+# CPU it can be made to spend:
+# - a realm hint limits the check to one Authentication row instead of all of them
+# - hashes are verified on a small worker pool, logins beyond its queue are denied
+# - failed logins per IP are throttled with an exponential backoff; the count
+#   starts over once an IP had no failure for AUTH_FAILURE_WINDOW seconds
+# - successful verifications are remembered for a short time, keyed by an HMAC
+#   with a per-process secret, so repeated logins skip the hash computation
+AUTH_WORKERS = int(os.environ.get('AUTH_WORKERS', 2))
+AUTH_MAX_PENDING = int(os.environ.get('AUTH_MAX_PENDING', AUTH_WORKERS * 4))
+AUTH_FREE_ATTEMPTS = int(os.environ.get('AUTH_FREE_ATTEMPTS', 3))
+AUTH_BACKOFF_BASE = float(os.environ.get('AUTH_BACKOFF_BASE', 1.0))
+AUTH_BACKOFF_MAX = float(os.environ.get('AUTH_BACKOFF_MAX', 900.0))
+AUTH_FAILURE_WINDOW = float(os.environ.get('AUTH_FAILURE_WINDOW', 3600.0))
+AUTH_CACHE_TTL = float(os.environ.get('AUTH_CACHE_TTL', 600.0))
+AUTH_TRACKED_IPS = 10000
+
+_hashPool = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="auth")
+_hashSlots = threading.BoundedSemaphore(AUTH_MAX_PENDING)
+_failedLogins = {}      # ip -> (failures, blockedUntil, lastFailure), least recently failed first
+_verifiedCache = {}     # hmac of password -> (authenticationId, passwordHash, expires)
+_authLock = threading.Lock()
+_cacheSecret = os.urandom(32)
+
+def getThrottleDelay(ip):
+    """
+    Returns the seconds an IP still has to wait before it may try to log in again, 0 if it may.
+    """
+    with _authLock:
+        entry = _failedLogins.get(ip)
+    if not entry:
+        return 0
+    return max(0, entry[1] - time.monotonic())
+
+def registerFailedLogin(ip):
+    """
+    Counts a failed login for an IP and blocks it for an exponentially growing time
+    once it used up AUTH_FREE_ATTEMPTS. Failures older than AUTH_FAILURE_WINDOW
+    (counted from the end of the last block) are forgotten.
+
+    Returns:
+        float: Seconds the IP is blocked for
     """
-    Compares provided plain text password to all stored hashes and automatically gives permissionLevel according to success full authentication Entry name
+    now = time.monotonic()
+    with _authLock:
+        previous = _failedLogins.pop(ip, None)  # Re-inserted below, keeps the dict ordered by last failure
+        failures = 1
+        if previous and now - max(previous[1], previous[2]) < AUTH_FAILURE_WINDOW:
+            failures = previous[0] + 1
+        # Forget expired IPs from the least recently failed end, then the oldest ones if still full
+        while _failedLogins:
+            oldestIp = next(iter(_failedLogins))
+            _, blockedUntil, lastFailure = _failedLogins[oldestIp]
+            if len(_failedLogins) < AUTH_TRACKED_IPS and now - max(blockedUntil, lastFailure) < AUTH_FAILURE_WINDOW:
+                break
+            del _failedLogins[oldestIp]
+        delay = 0
+        if failures > AUTH_FREE_ATTEMPTS:
+            delay = min(AUTH_BACKOFF_BASE * 2 ** (failures - AUTH_FREE_ATTEMPTS - 1), AUTH_BACKOFF_MAX)
+        _failedLogins[ip] = (failures, now + delay, now)
+    return delay
+
+def _cacheKey(password):
+    return hmac.new(_cacheSecret, password.encode("utf-8"), hashlib.sha256).digest()
+
+def _verifyPassword(password, candidates):
+    """
+    Checks the password against the (id, name, passwordHash) candidates. Runs on the hash pool.
+    Returns the matching candidate or None.
+    """
+    for candidate in candidates:
+        if check_password_hash(candidate[2], password):
+            return candidate
+    return None
+
+def authenticate(password, request, realm=None):
+    """
+    Compares provided plain text password to the stored hashes and automatically gives permissionLevel according to success full authentication Entry name
     
     Args:
         password: Plain text password to compare
         request: used for logging ip
+        realm: Name of the Authentication entry to check (optional), checks all entries if not given
         
     Returns:
         bool: True if successful and false if denied
     """
-    authentications = Authentication.query.all()
-    for authentication in authentications:
-        if check_password_hash(authentication.passwordHash, password):
-            session.clear()
-            session.permanent = True
-            session['authenticated'] = True
-            session['permissionLevel'] = authentication.name
-            session['loginTime'] = datetime.datetime.now()
-
-            log(2, "authenticate", f"SUCCESS: Authenticated user with Ip: {request.remote_addr} to {authentication.name} realm")
-            return True
-    log(2, "authenticate", f'DENIED: Can not authenticate user with Ip: {request.remote_addr}, because "{password}" does not match any registered passwordHash')
-    return False
\ No newline at end of file
+    ip = request.remote_addr
+    delay = getThrottleDelay(ip)
+    if delay:
+        incrementCounter("dreamrankr_auth_attempts_total", (("result", "throttled"),))
+        log(2, "authenticate", f"THROTTLED: Login attempt from Ip: {ip} blocked for another {delay:.0f}s")
+        flash(f"Too many failed attempts. Try again in {int(delay) + 1} seconds", "error")
+        return False
+
+    if not password:
+        incrementCounter("dreamrankr_auth_attempts_total", (("result", "denied"),))
+        registerFailedLogin(ip)
+        log(2, "authenticate", f"DENIED: Empty password from Ip: {ip}")
+        return False
+
+    query = Authentication.query
+    if realm:
+        query = query.filter_by(name=realm)
+    candidates = [(entry.id, entry.name, entry.passwordHash) for entry in query.all()]
+
+    matched = None
+    cacheKey = _cacheKey(password)
+    with _authLock:
+        cached = _verifiedCache.get(cacheKey)
+    if cached and cached[2] > time.monotonic():
+        # Only trust the cache while the stored hash is still the one that was verified
+        matched = next((candidate for candidate in candidates if candidate[0] == cached[0] and candidate[2] == cached[1]), None)
+
+    if not matched:
+        if not _hashSlots.acquire(blocking=False):
+            incrementCounter("dreamrankr_auth_attempts_total", (("result", "busy"),))
+            log(3, "authenticate", f"BUSY: Too many pending logins, denied Ip: {ip} without checking")
+            flash("Login is busy, please try again in a moment", "error")
+            return False
+        try:
+            matched = _hashPool.submit(_verifyPassword, password, candidates).result()
+        finally:
+            _hashSlots.release()
+        if matched:
+            with _authLock:
+                _verifiedCache[cacheKey] = (matched[0], matched[2], time.monotonic() + AUTH_CACHE_TTL)
+
+    if matched:
+        with _authLock:
+            _failedLogins.pop(ip, None)
+        session.clear()
+        session.permanent = True
+        session['authenticated'] = True
+        session['permissionLevel'] = matched[1]
+        session['loginTime'] = datetime.datetime.now()
+        incrementCounter("dreamrankr_auth_attempts_total", (("result", "success"),))
+
+        log(2, "authenticate", f"SUCCESS: Authenticated user with Ip: {ip} to {matched[1]} realm")
+        return True
+
+    incrementCounter("dreamrankr_auth_attempts_total", (("result", "denied"),))
+    registerFailedLogin(ip)
+    log(2, "authenticate", f"DENIED: Can not authenticate user with Ip: {ip}{f' for realm {realm}' if realm else ''}, password does not match any registered passwordHash")
+    return False
@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# =============================================================================
+# BENCHMARK SUITE
+# =============================================================================
+# Measures the main pages, API endpoints and service functions against a
+# database, e.g. one filled by generateData.py, and reports per scenario the
+# p50/p95/p99 latency and the number of SQL statements on the ranking database.
+# Results can be saved as a baseline and later runs compared against it:
+#   python generateData.py --database sqlite:///Bench.db --log-database sqlite:///BenchLogs.db --matches 500000
+#   python benchmark.py --database sqlite:///Bench.db --log-database sqlite:///BenchLogs.db --save baseline.json
+#   python benchmark.py --database sqlite:///Bench.db --log-database sqlite:///BenchLogs.db --compare baseline.json
+# --database and --log-database are required and must not be the app's
+# DATABASE_URL or LOG_DATABASE_URL. The write scenario (finishing matches) only
+# runs with --include-writes, on a copy of production data only.
+# The exit code is 1 if a scenario got slower than the threshold or needs more queries.
+
+BENCHMARK_ITERATIONS = 50
+BENCHMARK_WARMUP = 3
+
+class QueryCounter:
+    """
+    Counts the statements sent to an engine by the benchmark thread.
+    Statements of the log writer and scheduler threads are not counted.
+    """
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        self._threadId = threading.get_ident()
+        event.listen(engine, "before_cursor_execute", self._onExecute)
+
+    def _onExecute(self, *args):
+        if threading.get_ident() == self._threadId:
+            self.count += 1
+
+def getPercentile(sortedValues, percent):
+    """
+    Returns the nearest-rank percentile of an ascending list.
+    """
+    if not sortedValues:
+        return None
+    index = max(0, min(len(sortedValues) - 1, int(round(percent / 100 * len(sortedValues))) - 1))
+    return sortedValues[index]
+
+def runScenario(run, setup=None, iterations=BENCHMARK_ITERATIONS, warmup=BENCHMARK_WARMUP, counter=None):
+    """
+    Runs a scenario repeatedly, only run() is timed.
+
+    Args:
+        run: Callable measured in every iteration
+        setup: Callable run untimed before every iteration (optional)
+        iterations: Number of measured iterations
+        warmup: Number of unmeasured iterations first
+        counter: QueryCounter of the ranking database (optional)
+
+    Returns:
+        dict: p50, p95, p99 and max in milliseconds, median number of queries
+    """
+    timings = []
+    queries = []
+    for index in range(warmup + iterations):
+        if setup:
+            setup()
+        queriesBefore = counter.count if counter else 0
+        startedAt = time.perf_counter()
+        run()
+        elapsed = (time.perf_counter() - startedAt) * 1000
+        if index >= warmup:
+            timings.append(elapsed)
+            queries.append((counter.count if counter else 0) - queriesBefore)
+    timings.sort()
+    queries.sort()
+    return {
+        "iterations": iterations,
+        "p50": round(getPercentile(timings, 50), 3),
+        "p95": round(getPercentile(timings, 95), 3),
+        "p99": round(getPercentile(timings, 99), 3),
+        "max": round(timings[-1], 3),
+        "queries": queries[len(queries) // 2],
+    }
+
+def getScenarios(client, seed=1, includeWrites=False):
+    """
+    Builds the benchmark scenarios for the data in the database.
+    Uses the biggest ranking of every sorting mode. Must be called inside an app context.
+
+    Args:
+        client: Logged in test client
+        seed: Seed of the random player choice (optional)
+        includeWrites: Add the endMatch scenario, which changes the rankings (optional)
+
+    Returns:
+        list: (name, run, setup) tuples, read scenarios first
+    """
+    from db import db, PlayerRankings, Rankings, OnGoingMatches
+    from pageCache import invalidatePageCache
+    import services
+
+    rng = random.Random(seed)
+    sizes = db.session.query(
+        PlayerRankings.rankingId, Rankings.sortedBy, db.func.count(PlayerRankings.id)
+    ).join(Rankings, Rankings.id == PlayerRankings.rankingId).filter(Rankings.ended == False).group_by(
+        PlayerRankings.rankingId, Rankings.sortedBy
+    ).all()
+    biggest = {}
+    for rankingId, sortedBy, size in sizes:
+        if size > biggest.get(sortedBy, (None, 0))[1]:
+            biggest[sortedBy] = (rankingId, size)
+    if not biggest:
+        raise ValueError("No running ranking with players found, generate data first")
+
+    def checked(response):
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.path} answered {response.status_code}")
+        return response
+
+    scenarios = [
+        ("GET / (cached)", lambda: checked(client.get('/')), None),
+        ("GET / (uncached)", lambda: checked(client.get('/')), invalidatePageCache),
+        ("GET /api/v1/rankings", lambda: checked(client.get('/api/v1/rankings')), None),
+    ]
+    for sortedBy, (rankingId, size) in sorted(biggest.items()):
+        memberIds = [row.playerId for row in PlayerRankings.query.filter_by(rankingId=rankingId)]
+        label = f"{sortedBy}, {size} players"
+        scenarios += [
+            (f"GET /view/<id> (cached, {label})", lambda rankingId=rankingId: checked(client.get(f'/view/{rankingId}')), None),
+            (f"GET /view/<id> (uncached, {label})", lambda rankingId=rankingId: checked(client.get(f'/view/{rankingId}')), invalidatePageCache),
+            (f"GET /trainer/<id> ({label})", lambda rankingId=rankingId: checked(client.get(f'/trainer/{rankingId}')), None),
+            (f"GET /api/v1/rankings/<id>/players ({label})",
+             lambda rankingId=rankingId: checked(client.get(f'/api/v1/rankings/{rankingId}/players?limit=100')), None),
+            (f"getPlayersOfRanking ({label})", lambda rankingId=rankingId: services.getPlayersOfRanking(rankingId), None),
+            (f"getRankingOfPlayer ({label})",
+             lambda rankingId=rankingId, memberIds=memberIds: services.getRankingOfPlayer(rng.choice(memberIds), rankingId), None),
+        ]
+    scenarios.append(("checkAllRankings", services.checkAllRankings, None))
+    if not includeWrites:
+        return scenarios
+
+    # Write scenario: a challenge is started untimed, finishing it is measured
+    rankingId = biggest.get("standard", next(iter(biggest.values())))[0]
+    memberIds = [row.playerId for row in PlayerRankings.query.filter_by(rankingId=rankingId).order_by(PlayerRankings.ranking)]
+    pending = []
+
+    def startChallenge():
+        challengerIndex = rng.randrange(1, len(memberIds))
+        services.startMatch(memberIds[challengerIndex], memberIds[challengerIndex - 1], rankingId)
+        match = OnGoingMatches.query.filter_by(rankingId=rankingId).order_by(OnGoingMatches.id.desc()).first()
+        pending.append(match.id)
+
+    def finishChallenge():
+        services.endMatch(pending.pop(), rankingId, None, 3, rng.randint(0, 2))
+
+    scenarios.append((f"endMatch (standard, {len(memberIds)} players)", finishChallenge, startChallenge))
+    return scenarios
+
+def compareWithBaseline(results, baseline, threshold):
+    """
+    Prints the change against a baseline for every scenario.
+
+    Returns:
+        list: Names of the scenarios that regressed
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"{name}: no baseline")
+            continue
+        change = (result["p95"] - previous["p95"]) / previous["p95"] if previous["p95"] else 0
+        slower = change > threshold
+        moreQueries = result["queries"] > previous["queries"]
+        marker = " REGRESSION" if slower or moreQueries else ""
+        print(f"{name}: p95 {previous['p95']:.2f} -> {result['p95']:.2f} ms ({change:+.0%}), "
+              f"queries {previous['queries']} -> {result['queries']}{marker}")
+        if marker:
+            regressions.append(name)
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark DreamRankr pages and services")
+    parser.add_argument('--database', required=True, help="Database to benchmark, never the production database")
+    parser.add_argument('--log-database', required=True, help="Log database of the run, never the production log database")
+    parser.add_argument('--password', default=os.environ.get('trainerPassword', 'benchmark'), help="Trainer password")
+    parser.add_argument('--iterations', type=int, default=BENCHMARK_ITERATIONS)
+    parser.add_argument('--warmup', type=int, default=BENCHMARK_WARMUP)
+    parser.add_argument('--filter', default=None, help="Only run scenarios containing this text")
+    parser.add_argument('--save', default=None, help="Save the results as baseline JSON file")
+    parser.add_argument('--compare', default=None, help="Compare with a baseline JSON file")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed p95 slowdown against the baseline")
+    parser.add_argument('--include-writes', action='store_true',
+                        help="Also benchmark finishing matches, which swaps positions and archives matches")
+    arguments = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    if arguments.database == os.environ.get('DATABASE_URL', 'sqlite:///Main.db'):
+        sys.exit("Refusing to benchmark the app's DATABASE_URL, use a copy or a database filled by generateData.py")
+    if arguments.log_database == os.environ.get('LOG_DATABASE_URL', 'sqlite:///Logs.db'):
+        sys.exit("Refusing to write benchmark logs to the app's LOG_DATABASE_URL, pass a separate --log-database")
+
+    # app.py reads its configuration on import
+    os.environ['DATABASE_URL'] = arguments.database
+    os.environ['LOG_DATABASE_URL'] = arguments.log_database
+    os.environ.setdefault('LOCAL_TIMEZONE', 'UTC')
+    os.environ.setdefault('SECRET_KEY', os.urandom(24).hex())
+    from app import app
+    from db import db
+
+    client = app.test_client()
+    if client.post('/login', data={'password': arguments.password}).status_code >= 400:
+        sys.exit("Login failed, pass the trainer password with --password")
+    client.get('/')  # Shows the login flash, pages with pending flashes are never cached
+
+    results = {}
+    with app.app_context():
+        counter = QueryCounter(db.engines[None])
+        for name, run, setup in getScenarios(client, includeWrites=arguments.include_writes):
+            if arguments.filter and arguments.filter not in name:
+                continue
+            results[name] = runScenario(run, setup, arguments.iterations, arguments.warmup, counter)
+            result = results[name]
+            print(f"{name:<70} p50 {result['p50']:>9.2f}  p95 {result['p95']:>9.2f}  "
+                  f"p99 {result['p99']:>9.2f} ms  {result['queries']:>4} queries")
+
+    regressions = []
+    if arguments.compare:
+        with open(arguments.compare) as baselineFile:
+            regressions = compareWithBaseline(results, json.load(baselineFile), arguments.threshold)
+    if arguments.save:
+        with open(arguments.save, 'w') as baselineFile:
+            json.dump({"database": arguments.database, "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       "iterations": arguments.iterations, "results": results}, baselineFile, indent=2)
+        print(f"Saved baseline to {arguments.save}")
+    if regressions:
+        sys.exit(1)
@@ -1,6 +1,7 @@
 from db import db, Players, OnGoingMatches, PlayerBonuses, PlayerRankings
 from services import getRankingOfPlayer
 from logger import log
+from rankingVersions import markPlayersChanged
 
 class Bonus:
     """
@@ -60,8 +61,7 @@ def compareFromStr(ranking, operator, limitRanking):
             log(3, 'compareFromStrForBonus', f"Unknown operator: {operator}")
             return False
             
-        log(1, 'compareFromStrForBonus', 
-            f"Comparison: {ranking} {operator} {limitRanking} = {result}")
+        log(1, 'compareFromStrForBonus', "Comparison: {} {} {} = {}", ranking, operator, limitRanking, result)
         return result
         
     except (ValueError, TypeError) as e:
@@ -192,6 +192,7 @@ def updateOrCreatePlayerBonus(playerId, bonus, logicOperator, limitRanking):
                 f"Created bonus for player {player.name}({player.id}): {bonus} {logicOperator} {limitRanking}")
         
         db.session.commit()
+        markPlayersChanged([playerId])
         return True
         
     except (ValueError, TypeError) as e:
@@ -221,8 +222,8 @@ def validateBonusParameters(bonus, logicOperator, limitRanking):
         valid = (bonus and logicOperator and limitRanking and 
                 bonus != "" and logicOperator != "" and limitRanking != "")
         
-        log(1, "validateBonusParameters", 
-            f"Validation result: {valid} for bonus: {bonus}, operator: {logicOperator}, limit: {limitRanking}")
+        log(1, "validateBonusParameters", "Validation result: {} for bonus: {}, operator: {}, limit: {}",
+            valid, bonus, logicOperator, limitRanking)
         
         return valid
         
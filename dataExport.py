@@ -0,0 +1,175 @@
+from db import db, Players, PlayerRankings, FinishedMatches
+from rankingIndex import getPointsOrder, getRatingOrder
+from leaderboard import LifetimeStats
+from flask import Response
+import csv
+import datetime as dt
+import io
+import json
+import os
+
+# =============================================================================
+# BULK EXPORT
+# =============================================================================
+# Standings of a ranking, finished matches and lifetime stats as CSV or NDJSON
+# (one JSON object per line). Rows are read from a streaming cursor with
+# yield_per and written in batches, so an export of years of matches runs in
+# constant memory and the first bytes go out before the query has finished.
+# The generators run after the request context is gone: routes pass the engine
+# in, and the rows are read on a connection of their own.
+# Times are exported in UTC.
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+STANDINGS_FIELDS = ["position", "id", "name", "ranking", "points", "rating", "ratingDeviation",
+                    "wins", "losses", "setsWon", "setsLost"]
+MATCH_FIELDS = ["id", "rankingId", "timeStarted", "timeFinished", "challengerId", "challenger", "defenderId", "defender",
+                "winnerId", "winner", "challengerScore", "defenderScore"]
+LIFETIME_FIELDS = ["id", "name", "wins", "losses", "setsWon", "setsLost", "matches", "winRate", "setRatio"]
+
+STANDINGS_ORDERS = {
+    "standard": lambda: (PlayerRankings.ranking.asc(),),
+    "points": getPointsOrder,    # Descending for points, ties by ranking
+    "rating": getRatingOrder,    # Descending for rating, ties by ranking
+}
+
+def parseDateArg(value, name):
+    """
+    Parses an ISO date or datetime from a query parameter.
+
+    Returns:
+        datetime or None if no value was given
+
+    Raises:
+        ValueError: If the value is not an ISO date
+    """
+    if not value:
+        return None
+    try:
+        return dt.datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date, e.g. 2025-01-31 or 2025-01-31T12:00")
+
+def formatValue(value):
+    if isinstance(value, dt.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=dt.timezone.utc)  # Stored as UTC
+        return value.isoformat()
+    return value
+
+def streamRows(engine, statement, fields, exportFormat, toRecord=None, batchSize=EXPORT_BATCH_SIZE):
+    """
+    Generator writing the rows of a statement as CSV (with header) or NDJSON.
+
+    Args:
+        engine: Engine to read from
+        statement: Select to export, with its final ordering
+        fields: Exported attributes, in column order
+        exportFormat: "csv" or "ndjson"
+        toRecord: Turns (row, index) into the exported object (optional, defaults to the row)
+        batchSize: Rows fetched and written per chunk (optional)
+
+    Yields:
+        str: Chunks of the export
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if exportFormat == "csv" else None
+    if writer:
+        writer.writerow(fields)
+        yield buffer.getvalue()  # Send the header before the query runs
+        buffer.seek(0)
+        buffer.truncate()
+    written = 0
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batchSize).execute(statement)
+        for index, row in enumerate(result):
+            record = toRecord(row, index) if toRecord else row
+            values = [formatValue(getattr(record, field, None)) for field in fields]
+            if writer:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(fields, values))) + "\n")
+            written += 1
+            if written % batchSize == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def createExportResponse(chunks, exportFormat, name):
+    """
+    Streaming download response for the chunks of an export.
+
+    Args:
+        chunks: Generator from streamRows
+        exportFormat: "csv" or "ndjson"
+        name: File name without date and extension
+    """
+    filename = f"{name}-{dt.datetime.now(dt.timezone.utc).strftime('%Y%m%d-%H%M%S')}.{exportFormat}"
+    return Response(
+        chunks,
+        mimetype=EXPORT_FORMATS[exportFormat],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+class _Standing:
+    """
+    Row of the standings with its place in the ranking order.
+    """
+    __slots__ = ("row", "position")
+
+    def __init__(self, row, position):
+        self.row = row
+        self.position = position
+
+    def __getattr__(self, name):
+        return getattr(self.row, name)
+
+def buildStandingsQuery(rankingId, sortedBy):
+    """
+    Select of the players of a ranking in ranking order, the same order as getPlayersOfRanking.
+
+    Raises:
+        ValueError: If sortedBy is not a known ranking system
+    """
+    if sortedBy not in STANDINGS_ORDERS:
+        raise ValueError(f"Invalid sorting option '{sortedBy}'")
+    return db.select(
+        Players.id, Players.name, Players.wins, Players.losses, Players.setsWon, Players.setsLost,
+        PlayerRankings.ranking, PlayerRankings.points, PlayerRankings.rating, PlayerRankings.ratingDeviation
+    ).join(
+        PlayerRankings, Players.id == PlayerRankings.playerId
+    ).where(PlayerRankings.rankingId == rankingId).order_by(*STANDINGS_ORDERS[sortedBy]())
+
+def streamStandings(engine, rankingId, sortedBy, exportFormat):
+    return streamRows(engine, buildStandingsQuery(rankingId, sortedBy), STANDINGS_FIELDS, exportFormat,
+                      toRecord=lambda row, index: _Standing(row, index + 1))
+
+def buildMatchesQuery(rankingId=None, since=None, until=None):
+    """
+    Select of the finished matches, oldest first, optionally of one ranking and
+    finished in [since, until). Times are naive UTC like the stored values.
+    """
+    statement = db.select(*(getattr(FinishedMatches, field) for field in MATCH_FIELDS))
+    if rankingId is not None:
+        statement = statement.where(FinishedMatches.rankingId == rankingId)
+    if since:
+        statement = statement.where(FinishedMatches.timeFinished >= since)
+    if until:
+        statement = statement.where(FinishedMatches.timeFinished < until)
+    return statement.order_by(FinishedMatches.timeFinished.asc(), FinishedMatches.id.asc())
+
+def streamMatches(engine, exportFormat, rankingId=None, since=None, until=None):
+    return streamRows(engine, buildMatchesQuery(rankingId, since, until), MATCH_FIELDS, exportFormat)
+
+def streamLifetimeStats(engine, exportFormat):
+    """
+    Lifetime stats of all players in leaderboard order, with win rate and set ratio.
+    """
+    statement = db.select(
+        Players.id, Players.name, Players.wins, Players.losses, Players.setsWon, Players.setsLost
+    ).order_by(Players.wins.desc(), Players.id.asc())
+    return streamRows(engine, statement, LIFETIME_FIELDS, exportFormat,
+                      toRecord=lambda row, index: LifetimeStats(*row))
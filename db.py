@@ -1,9 +1,104 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime, timezone
+import os
 
 # Initialize SQLAlchemy database instance
 db = SQLAlchemy()
 
+# =============================================================================
+# SQLITE CONNECTION PROFILES
+# =============================================================================
+# Pragmas applied to every new SQLite connection. "wal" lets viewers read while
+# a trainer writes, "relaxed" trades durability for speed (meant for the log
+# database) and "safe" keeps SQLite's default rollback journal.
+# Select with DB_PROFILE (LOG_DB_PROFILE for the log database), single values
+# can be overridden with SQLITE_<PRAGMA>.
+SQLITE_PROFILES = {
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,       # ms to wait for a lock before failing
+        "mmap_size": 268435456,     # 256 MB memory mapped reads
+        "cache_size": -20000,       # negative values are KiB, so 20 MB page cache
+    },
+    "relaxed": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",       # fastest, the last writes may be lost on power failure
+        "busy_timeout": 5000,
+        "cache_size": -4000,
+    },
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+}
+
+def getSqlitePragmas(profile=None):
+    """
+    Returns the pragmas of a SQLite profile with environment overrides applied.
+
+    Args:
+        profile: Name of the profile, defaults to the DB_PROFILE environment variable or "wal"
+
+    Returns:
+        dict: Pragma names and values
+    """
+    profile = profile or os.environ.get('DB_PROFILE', 'wal')
+    pragmas = dict(SQLITE_PROFILES.get(profile, SQLITE_PROFILES["wal"]))
+    for pragma in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size"):
+        override = os.environ.get(f'SQLITE_{pragma.upper()}')
+        if override:
+            pragmas[pragma] = override
+    return pragmas
+
+def getEngineOptions(uri):
+    """
+    Returns SQLALCHEMY_ENGINE_OPTIONS with pool settings for a database URI.
+    In-memory SQLite databases keep the driver defaults.
+
+    Args:
+        uri: Database URI the options are for
+
+    Returns:
+        dict: Engine options
+    """
+    if uri.startswith("sqlite") and (":memory:" in uri or uri.rstrip("/") in ("sqlite:", "sqlite:/")):
+        return {}
+    return {
+        "pool_size": int(os.environ.get('DB_POOL_SIZE', 10)),
+        "max_overflow": int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        "pool_timeout": int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        "pool_recycle": int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+        "pool_pre_ping": True,
+    }
+
+def applySqliteProfile(engine, pragmas=None):
+    """
+    Registers a connect event that applies the pragmas to every new connection of a SQLite engine.
+    Does nothing for other databases.
+
+    Args:
+        engine: SQLAlchemy engine
+        pragmas: Pragmas to apply, defaults to getSqlitePragmas()
+
+    Returns:
+        None
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = pragmas or getSqlitePragmas()
+
+    @event.listens_for(engine, "connect")
+    def setSqlitePragmas(dbapiConnection, connectionRecord):
+        cursor = dbapiConnection.cursor()
+        try:
+            for pragma, value in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
+
 class Players(db.Model):
     """
     Represents individual players in the ranking system.
@@ -45,8 +140,13 @@ class PlayerRankings(db.Model):
     lastPoints = db.Column(db.Integer, nullable=True)
     lastRankingChanged = db.Column(db.DateTime, nullable=True)         # When the ranking position last changed
     points = db.Column(db.Integer, nullable=False)                     # Points earned in this ranking
+    rating = db.Column(db.Float, nullable=False, default=1500.0, server_default="1500")             # Glicko skill rating in this ranking
+    ratingDeviation = db.Column(db.Float, nullable=False, default=350.0, server_default="350")     # Uncertainty of the rating
     __table_args__ = (
-        db.UniqueConstraint('playerId', 'rankingId', name='uq_player_ranking'),  # One entry per player per ranking
+        db.UniqueConstraint('playerId', 'rankingId', name='uq_player_ranking'),  # One entry per player per ranking, also serves (playerId, rankingId) lookups
+        db.Index('ix_player_rankings_ranking_position', 'rankingId', 'ranking'),  # Standard order and swaps by position
+        db.Index('ix_player_rankings_ranking_points', 'rankingId', 'points'),     # Points order
+        db.Index('ix_player_rankings_ranking_rating', 'rankingId', 'rating'),     # Rating order
     )
 
 class PlayerBonuses(db.Model):
@@ -59,6 +159,9 @@ class PlayerBonuses(db.Model):
     bonus = db.Column(db.Integer, nullable=False)              # Bonus points amount
     logicOperator = db.Column(db.String(2), nullable=False)    # Comparison operator (=, <, <=, >, >=)
     limitRanking = db.Column(db.Integer, nullable=False)       # Ranking threshold for bonus activation
+    __table_args__ = (
+        db.Index('ix_player_bonuses_player', 'playerId'),
+    )
 
 class OnGoingMatches(db.Model):
     """
@@ -74,6 +177,11 @@ class OnGoingMatches(db.Model):
     defenderBonus = db.Column(db.Integer)                      # Bonus points for defender if they win
     timeStarted = db.Column(db.DateTime, nullable=False)       # When the match was started
     rankingId = db.Column(db.Integer, db.ForeignKey('rankings.id'), nullable=False)  # Which ranking this match belongs to
+    __table_args__ = (
+        db.Index('ix_on_going_matches_ranking_started', 'rankingId', 'timeStarted'),  # Active matches of a ranking in start order
+        db.Index('ix_on_going_matches_challenger', 'challengerId'),
+        db.Index('ix_on_going_matches_defender', 'defenderId'),
+    )
 
 class FinishedMatches(db.Model):
     """
@@ -92,17 +200,59 @@ class FinishedMatches(db.Model):
     challengerScore = db.Column(db.Integer, nullable=True)     # Sets won by challenger (optional)
     defenderScore = db.Column(db.Integer, nullable=True)       # Sets won by defender (optional)
     rankingId = db.Column(db.Integer, db.ForeignKey('rankings.id'), nullable=False)  # Which ranking this match belonged to
+    __table_args__ = (
+        db.Index('ix_finished_matches_ranking_finished', 'rankingId', 'timeFinished'),  # History of a ranking by date
+        db.Index('ix_finished_matches_finished', 'timeFinished'),                       # History of all rankings by date
+    )
+
+class HeadToHead(db.Model):
+    """
+    Head-to-head record of a player against one opponent in one ranking, maintained when a match is finished.
+    Every pair is stored in both directions so lookups never need to scan FinishedMatches.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    playerId = db.Column(db.Integer, nullable=False)            # Player the record belongs to
+    opponentId = db.Column(db.Integer, nullable=False)          # Opponent of the player
+    rankingId = db.Column(db.Integer, db.ForeignKey('rankings.id'), nullable=False)
+    wins = db.Column(db.Integer, nullable=False, default=0)     # Matches the player won against the opponent
+    losses = db.Column(db.Integer, nullable=False, default=0)   # Matches the player lost against the opponent
+    setsWon = db.Column(db.Integer, nullable=False, default=0)
+    setsLost = db.Column(db.Integer, nullable=False, default=0)
+    lastPlayed = db.Column(db.DateTime, nullable=True)          # When the last match of the pair finished
+    __table_args__ = (
+        db.UniqueConstraint('rankingId', 'playerId', 'opponentId', name='uq_head_to_head'),  # Also serves the opponents of a player
+    )
+
+class PlayerForm(db.Model):
+    """
+    Recent results of a player in one ranking, maintained when a match is finished.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    playerId = db.Column(db.Integer, nullable=False)
+    rankingId = db.Column(db.Integer, db.ForeignKey('rankings.id'), nullable=False)
+    results = db.Column(db.String(20), nullable=False, default="")  # Newest first, "W" for a win and "L" for a loss
+    __table_args__ = (
+        db.UniqueConstraint('rankingId', 'playerId', name='uq_player_form'),  # Also serves the form of a whole ranking
+    )
 
 class LogEntries(db.Model):
     """
     System logging table for tracking application events, errors, and debugging information.
     Provides audit trail and troubleshooting capabilities.
+    Stored in its own database (bind "logs"), so logging never takes the ranking database's write lock.
     """
+    __bind_key__ = 'logs'
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.now(timezone.utc))  # When the log entry was created
     level = db.Column(db.String(15))        # Log level (Debug, Information, Warning, Error, etc.)
     origin = db.Column(db.String(25))       # Function or module that generated the log
     message = db.Column(db.Text)            # Log message content
+    __table_args__ = (
+        db.Index('ix_log_entries_timestamp', 'timestamp'),
+        db.Index('ix_log_entries_level', 'level'),      # Per level retention cap
+        db.Index('ix_log_entries_level_timestamp', 'level', 'timestamp'),    # Log browser filtered by level
+        db.Index('ix_log_entries_origin_timestamp', 'origin', 'timestamp'),  # Log browser filtered by origin
+    )
 
 class Authentication(db.Model):
     """
@@ -0,0 +1,246 @@
+from db import db, Players, Rankings, PlayerRankings, FinishedMatches, LogEntries, Authentication, getEngineOptions
+from logger import log
+from headToHead import rebuildHeadToHead
+from ratings import replayRatings
+from flask import Flask
+from werkzeug.security import generate_password_hash
+import argparse
+import datetime as dt
+import math
+import os
+import random
+
+# =============================================================================
+# SYNTHETIC DATA GENERATOR
+# =============================================================================
+# Fills a database with a realistic club at a configurable scale, for load tests
+# and the benchmark suite (benchmark.py):
+# - players with a hidden skill, members of several rankings each
+# - rankings sorted by position, points and rating, some ended, some with an end date
+# - finished matches spread over the last DAYS days, the stronger player wins more often
+# - log entries on the logs database
+# Lifetime stats, points, head-to-head records and ratings are derived from the
+# generated matches, so the data is consistent with what the app would have written.
+# Rows are written with bulk inserts in batches, not through the service layer.
+#
+# `python generateData.py --players 5000 --rankings 200 --matches 500000 --database sqlite:///Bench.db --log-database sqlite:///BenchLogs.db`
+# Both databases are required and must not be the app's DATABASE_URL or
+# LOG_DATABASE_URL. The target database must be empty unless --reset is given.
+
+FIRST_NAMES = ["Anna", "Ben", "Clara", "David", "Emma", "Felix", "Greta", "Hannah", "Jonas", "Lea", "Lukas", "Marie",
+               "Mia", "Noah", "Paul", "Sophie", "Tim", "Emil", "Lina", "Finn", "Ida", "Max", "Nora", "Oskar"]
+LAST_NAMES = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann",
+              "Koch", "Richter", "Klein", "Wolf", "Neumann", "Schwarz", "Braun", "Zimmermann", "Krüger", "Hartmann"]
+LOG_ORIGINS = ["getplayersofranking", "getrankingofplayer", "startmatch", "endmatch", "applymatchresult",
+               "authenticate", "addplayertoranking", "checkifrankingended", "publishstandings", "prunelogs"]
+LOG_LEVELS = (("Information", 80), ("Authentication", 8), ("Warning", 9), ("Error", 3))
+
+def _insertInBatches(model, rows, batchSize):
+    """
+    Bulk inserts an iterable of row dicts, batchSize rows per statement.
+
+    Returns:
+        int: Number of inserted rows
+    """
+    inserted = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batchSize:
+            db.session.execute(db.insert(model), batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(model), batch)
+        inserted += len(batch)
+    return inserted
+
+def generateData(players=500, rankings=20, matches=20000, logs=10000, playersPerRanking=50, days=365,
+                 seed=1, trainerPassword="benchmark", viewerPassword="benchmark", batchSize=5000):
+    """
+    Generates a complete dataset in the database of the current app context.
+    Must be called inside an app context on an empty database.
+
+    Args:
+        players: Number of players
+        rankings: Number of rankings
+        matches: Number of finished matches, spread over the rankings by their size
+        logs: Number of log entries
+        playersPerRanking: Average number of players per ranking
+        days: Number of days the matches and logs are spread over, ending now
+        seed: Random seed, the same arguments always generate the same data
+        trainerPassword: Password of the trainer login, created if missing
+        viewerPassword: Password of the viewer login, created if missing
+        batchSize: Rows per insert statement
+
+    Returns:
+        dict: Number of generated rows per table
+
+    Raises:
+        ValueError: If the database already contains players or the arguments are invalid
+    """
+    if players < 2 or rankings < 1:
+        raise ValueError("At least 2 players and 1 ranking are required")
+    if db.session.query(Players.id).first() is not None:
+        raise ValueError("The database already contains players, use an empty database or --reset")
+
+    rng = random.Random(seed)
+    now = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    start = now - dt.timedelta(days=days)
+
+    # Players with a hidden skill that decides their matches
+    names = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index}" for index in range(1, players + 1)]
+    _insertInBatches(Players, ({"id": index, "name": name, "wins": 0, "losses": 0, "setsWon": 0, "setsLost": 0}
+                               for index, name in enumerate(names, start=1)), batchSize)
+    skills = {playerId: rng.gauss(0, 1) for playerId in range(1, players + 1)}
+
+    # Rankings in all three sorting modes
+    rankingRows = []
+    for rankingId in range(1, rankings + 1):
+        roll = rng.random()
+        ended = roll < 0.15
+        rankingRows.append({
+            "id": rankingId, "name": f"Ranking {rankingId}", "description": f"Generated ranking {rankingId}",
+            "sortedBy": rng.choices(("standard", "points", "rating"), weights=(6, 3, 1))[0],
+            "tournament": False, "ended": ended,
+            "endsOn": now + dt.timedelta(days=rng.randint(1, 90)) if not ended and roll < 0.4 else None,
+        })
+    _insertInBatches(Rankings, rankingRows, batchSize)
+
+    # Members of every ranking, positions follow skill with some noise
+    members = {}
+    maxSize = min(players, max(2, playersPerRanking * 2 - 2))
+    for rankingId in range(1, rankings + 1):
+        size = rng.randint(min(2, maxSize), maxSize)
+        memberIds = rng.sample(range(1, players + 1), size)
+        memberIds.sort(key=lambda playerId: -(skills[playerId] + rng.gauss(0, 0.5)))
+        members[rankingId] = memberIds
+    _insertInBatches(PlayerRankings, ({"playerId": playerId, "rankingId": rankingId, "ranking": position, "points": 0}
+                                      for rankingId, memberIds in members.items()
+                                      for position, playerId in enumerate(memberIds, start=1)), batchSize)
+
+    # Finished matches in time order, bigger rankings play more
+    rankingIds = list(members)
+    cumulativeWeights = []
+    total = 0
+    for rankingId in rankingIds:
+        total += len(members[rankingId])
+        cumulativeWeights.append(total)
+    lifetime = {playerId: [0, 0, 0, 0] for playerId in range(1, players + 1)}  # wins, losses, setsWon, setsLost
+    points = {}  # (rankingId, playerId) -> points
+    step = (now - start) / max(matches, 1)
+
+    def matchRows():
+        for index in range(matches):
+            rankingId = rng.choices(rankingIds, cum_weights=cumulativeWeights)[0]
+            memberIds = members[rankingId]
+            challengerIndex = rng.randrange(1, len(memberIds))
+            defenderIndex = rng.randrange(max(0, challengerIndex - 5), challengerIndex)  # Challenges go upwards
+            challengerId, defenderId = memberIds[challengerIndex], memberIds[defenderIndex]
+            challengerChance = 1 / (1 + math.exp(skills[defenderId] - skills[challengerId]))
+            challengerWon = rng.random() < challengerChance
+            winnerId, loserId = (challengerId, defenderId) if challengerWon else (defenderId, challengerId)
+            loserSets = rng.choices((0, 1, 2), weights=(4, 3, 2))[0]
+            challengerScore, defenderScore = (3, loserSets) if challengerWon else (loserSets, 3)
+
+            lifetime[winnerId][0] += 1
+            lifetime[loserId][1] += 1
+            lifetime[winnerId][2] += 3
+            lifetime[winnerId][3] += loserSets
+            lifetime[loserId][2] += loserSets
+            lifetime[loserId][3] += 3
+            points[(rankingId, winnerId)] = points.get((rankingId, winnerId), 0) + 2
+            points[(rankingId, loserId)] = points.get((rankingId, loserId), 0) + 1
+
+            timeFinished = start + step * index + dt.timedelta(seconds=rng.randint(0, 59))
+            yield {
+                "challenger": names[challengerId - 1], "challengerId": challengerId,
+                "defender": names[defenderId - 1], "defenderId": defenderId,
+                "timeStarted": timeFinished - dt.timedelta(minutes=rng.randint(10, 60)), "timeFinished": timeFinished,
+                "winner": names[winnerId - 1], "winnerId": winnerId,
+                "challengerScore": challengerScore, "defenderScore": defenderScore, "rankingId": rankingId,
+            }
+    generatedMatches = _insertInBatches(FinishedMatches, matchRows(), batchSize)
+
+    # Counters derived from the matches
+    db.session.execute(db.update(Players), [
+        {"id": playerId, "wins": wins, "losses": losses, "setsWon": setsWon, "setsLost": setsLost}
+        for playerId, (wins, losses, setsWon, setsLost) in lifetime.items()
+    ])
+    entries = db.session.query(PlayerRankings.id, PlayerRankings.rankingId, PlayerRankings.playerId).all()
+    db.session.execute(db.update(PlayerRankings), [
+        {"id": entryId, "points": points.get((rankingId, playerId), 0)} for entryId, rankingId, playerId in entries
+    ])
+
+    for name, password in (("trainer", trainerPassword), ("viewer", viewerPassword)):
+        if not Authentication.query.filter_by(name=name).first():
+            db.session.add(Authentication(name=name, passwordHash=generate_password_hash(password)))
+    db.session.commit()
+
+    # Log entries, written to the logs database
+    levelNames = [level for level, _ in LOG_LEVELS]
+    levelWeights = [weight for _, weight in LOG_LEVELS]
+    logStep = (now - start) / max(logs, 1)
+    generatedLogs = _insertInBatches(LogEntries, ({
+        "timestamp": start + logStep * index,
+        "level": rng.choices(levelNames, weights=levelWeights)[0],
+        "origin": rng.choice(LOG_ORIGINS),
+        "message": f"Generated log entry {index} for player {rng.randint(1, players)} in ranking {rng.randint(1, rankings)}",
+    } for index in range(logs)), batchSize)
+    db.session.commit()
+
+    rebuildHeadToHead()
+    replayRatings()
+
+    counts = {"players": players, "rankings": rankings, "playerRankings": len(entries),
+              "finishedMatches": generatedMatches, "logEntries": generatedLogs}
+    log(1, "generateData", f"Generated dataset: {counts}")
+    return counts
+
+def createGeneratorApp(databaseUri, logDatabaseUri):
+    """
+    Creates a minimal app bound to the target databases, configured like app.py.
+    """
+    generatorApp = Flask(__name__)
+    generatorApp.config['SQLALCHEMY_DATABASE_URI'] = databaseUri
+    generatorApp.config['SQLALCHEMY_ENGINE_OPTIONS'] = getEngineOptions(databaseUri)
+    generatorApp.config['SQLALCHEMY_BINDS'] = {'logs': {'url': logDatabaseUri, **getEngineOptions(logDatabaseUri)}}
+    generatorApp.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(generatorApp)
+    return generatorApp
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a synthetic DreamRankr dataset")
+    parser.add_argument('--database', required=True, help="Database to fill, never the production database")
+    parser.add_argument('--log-database', required=True, help="Log database to fill, never the production log database")
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--rankings', type=int, default=20)
+    parser.add_argument('--matches', type=int, default=20000)
+    parser.add_argument('--logs', type=int, default=10000)
+    parser.add_argument('--players-per-ranking', type=int, default=50)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--trainer-password', default=os.environ.get('trainerPassword', 'benchmark'))
+    parser.add_argument('--viewer-password', default=os.environ.get('viewerPassword', 'benchmark'))
+    parser.add_argument('--reset', action='store_true', help="Drop all existing data first")
+    arguments = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    if arguments.database == os.environ.get('DATABASE_URL', 'sqlite:///Main.db'):
+        raise SystemExit("Refusing to fill the app's DATABASE_URL, pass a separate --database")
+    if arguments.log_database == os.environ.get('LOG_DATABASE_URL', 'sqlite:///Logs.db'):
+        raise SystemExit("Refusing to fill the app's LOG_DATABASE_URL, pass a separate --log-database")
+
+    generatorApp = createGeneratorApp(arguments.database, arguments.log_database)
+    with generatorApp.app_context():
+        if arguments.reset:
+            db.drop_all()
+        db.create_all()
+        startedAt = dt.datetime.now()
+        counts = generateData(
+            players=arguments.players, rankings=arguments.rankings, matches=arguments.matches, logs=arguments.logs,
+            playersPerRanking=arguments.players_per_ranking, days=arguments.days, seed=arguments.seed,
+            trainerPassword=arguments.trainer_password, viewerPassword=arguments.viewer_password,
+        )
+    print(f"Generated {counts} in {(dt.datetime.now() - startedAt).total_seconds():.1f}s")
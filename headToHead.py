@@ -0,0 +1,215 @@
+from db import db, Players, FinishedMatches, HeadToHead, PlayerForm
+from logger import log
+from sqlalchemy import and_, inspect, or_, tuple_
+from collections import deque
+import os
+
+# =============================================================================
+# HEAD-TO-HEAD STATISTICS
+# =============================================================================
+# Per-pair records (HeadToHead) and the recent results of every player
+# (PlayerForm) are maintained incrementally in the transaction that finishes a
+# match, so reading them never touches FinishedMatches:
+# - the record of a pair is one indexed row lookup
+# - the opponents of a player or the form of a whole ranking are one indexed
+#   range read over the rows that are shown
+# rebuildHeadToHead recomputes both tables from FinishedMatches.
+
+HEAD_TO_HEAD_FORM_LENGTH = max(1, min(int(os.environ.get('HEAD_TO_HEAD_FORM_LENGTH', 5)), 20))
+
+def recordHeadToHead(finishedMatch):
+    """
+    Adds a finished match to the head-to-head records and the form of both players.
+    Runs inside the caller's transaction, does not commit.
+
+    Args:
+        finishedMatch: FinishedMatches object that was just archived
+
+    Returns:
+        None
+    """
+    rankingId = finishedMatch.rankingId
+    challengerId = finishedMatch.challengerId
+    defenderId = finishedMatch.defenderId
+    challengerSets = finishedMatch.challengerScore or 0
+    defenderSets = finishedMatch.defenderScore or 0
+    outcomes = {
+        challengerId: (defenderId, finishedMatch.winnerId == challengerId, challengerSets, defenderSets),
+        defenderId: (challengerId, finishedMatch.winnerId == defenderId, defenderSets, challengerSets),
+    }
+
+    records = {record.playerId: record for record in HeadToHead.query.filter(
+        HeadToHead.rankingId == rankingId,
+        or_(and_(HeadToHead.playerId == challengerId, HeadToHead.opponentId == defenderId),
+            and_(HeadToHead.playerId == defenderId, HeadToHead.opponentId == challengerId))
+    ).all()}
+    forms = {form.playerId: form for form in PlayerForm.query.filter(
+        PlayerForm.rankingId == rankingId, PlayerForm.playerId.in_([challengerId, defenderId])
+    ).all()}
+
+    for playerId, (opponentId, won, setsWon, setsLost) in outcomes.items():
+        record = records.get(playerId)
+        if record is None:
+            record = HeadToHead(playerId=playerId, opponentId=opponentId, rankingId=rankingId,
+                                wins=0, losses=0, setsWon=0, setsLost=0)
+            db.session.add(record)
+        record.wins += 1 if won else 0
+        record.losses += 0 if won else 1
+        record.setsWon += setsWon
+        record.setsLost += setsLost
+        record.lastPlayed = db.func.now()
+
+        form = forms.get(playerId)
+        if form is None:
+            form = PlayerForm(playerId=playerId, rankingId=rankingId, results="")
+            db.session.add(form)
+        form.results = (("W" if won else "L") + form.results)[:HEAD_TO_HEAD_FORM_LENGTH]
+
+def getOpponents(playerId, rankingId):
+    """
+    Returns the head-to-head records of a player against every opponent in a ranking,
+    most played first. Reads only the rows of that player.
+
+    Returns:
+        list: (HeadToHead, opponent name) tuples
+    """
+    rows = db.session.query(HeadToHead, Players.name).join(
+        Players, Players.id == HeadToHead.opponentId
+    ).filter(HeadToHead.rankingId == rankingId, HeadToHead.playerId == playerId).all()
+    return sorted(rows, key=lambda row: (-(row[0].wins + row[0].losses), row[0].opponentId))
+
+def getRecentForms(rankingId):
+    """
+    Returns the recent results of every player of a ranking.
+
+    Returns:
+        dict: playerId -> list of "W"/"L", newest first
+    """
+    try:
+        rows = db.session.query(PlayerForm.playerId, PlayerForm.results).filter(PlayerForm.rankingId == rankingId).all()
+        return {row.playerId: list(row.results) for row in rows}
+    except Exception as e:
+        log(3, "getRecentForms", f"Could not load recent form of ranking {rankingId}: {e}")
+        return {}
+
+def getHeadToHeadOfMatches(matches):
+    """
+    Returns the head-to-head record of the two players of every given match, with one query.
+
+    Args:
+        matches: OnGoingMatches objects
+
+    Returns:
+        dict: matchId -> (challenger wins, defender wins) against each other
+    """
+    if not matches:
+        return {}
+    try:
+        keys = {(match.rankingId, match.challengerId, match.defenderId) for match in matches}
+        records = {
+            (record.rankingId, record.playerId, record.opponentId): record
+            for record in HeadToHead.query.filter(
+                tuple_(HeadToHead.rankingId, HeadToHead.playerId, HeadToHead.opponentId).in_(keys)
+            ).all()
+        }
+    except Exception as e:
+        log(3, "getHeadToHeadOfMatches", f"Could not load head-to-head records: {e}")
+        return {}
+    output = {}
+    for match in matches:
+        record = records.get((match.rankingId, match.challengerId, match.defenderId))
+        output[match.id] = (record.wins, record.losses) if record else (0, 0)
+    return output
+
+def deleteHeadToHead(playerId=None, rankingId=None):
+    """
+    Removes the records and form of a deleted player or ranking. Does not commit.
+
+    Args:
+        playerId: ID of the deleted player (optional)
+        rankingId: ID of the deleted ranking (optional)
+
+    Returns:
+        None
+    """
+    if playerId is not None:
+        HeadToHead.query.filter(or_(HeadToHead.playerId == playerId, HeadToHead.opponentId == playerId)).delete(synchronize_session=False)
+        PlayerForm.query.filter(PlayerForm.playerId == playerId).delete(synchronize_session=False)
+    if rankingId is not None:
+        HeadToHead.query.filter(HeadToHead.rankingId == rankingId).delete(synchronize_session=False)
+        PlayerForm.query.filter(PlayerForm.rankingId == rankingId).delete(synchronize_session=False)
+
+def rebuildHeadToHead():
+    """
+    Recomputes all head-to-head records and forms from FinishedMatches.
+    Streams the matches in batches, memory use depends on the number of pairs, not of matches.
+
+    Returns:
+        int: Number of processed matches, None on error
+    """
+    try:
+        records = {}   # (rankingId, playerId, opponentId) -> [wins, losses, setsWon, setsLost, lastPlayed]
+        forms = {}     # (rankingId, playerId) -> deque of results, newest first
+        processed = 0
+        playerIds = {row.id for row in db.session.query(Players.id)}  # Deleted players get no records
+        matches = db.session.query(
+            FinishedMatches.rankingId, FinishedMatches.challengerId, FinishedMatches.defenderId,
+            FinishedMatches.winnerId, FinishedMatches.challengerScore, FinishedMatches.defenderScore,
+            FinishedMatches.timeFinished
+        ).order_by(FinishedMatches.timeFinished.asc(), FinishedMatches.id.asc()).yield_per(1000)
+        for rankingId, challengerId, defenderId, winnerId, challengerScore, defenderScore, timeFinished in matches:
+            if challengerId not in playerIds or defenderId not in playerIds:
+                continue
+            for playerId, opponentId, setsWon, setsLost in (
+                (challengerId, defenderId, challengerScore or 0, defenderScore or 0),
+                (defenderId, challengerId, defenderScore or 0, challengerScore or 0),
+            ):
+                won = winnerId == playerId
+                record = records.setdefault((rankingId, playerId, opponentId), [0, 0, 0, 0, None])
+                record[0 if won else 1] += 1
+                record[2] += setsWon
+                record[3] += setsLost
+                record[4] = timeFinished
+                forms.setdefault((rankingId, playerId), deque(maxlen=HEAD_TO_HEAD_FORM_LENGTH)).appendleft("W" if won else "L")
+            processed += 1
+
+        HeadToHead.query.delete()
+        PlayerForm.query.delete()
+        if records:
+            db.session.execute(db.insert(HeadToHead), [
+                {"rankingId": rankingId, "playerId": playerId, "opponentId": opponentId, "wins": wins, "losses": losses,
+                 "setsWon": setsWon, "setsLost": setsLost, "lastPlayed": lastPlayed}
+                for (rankingId, playerId, opponentId), (wins, losses, setsWon, setsLost, lastPlayed) in records.items()
+            ])
+            db.session.execute(db.insert(PlayerForm), [
+                {"rankingId": rankingId, "playerId": playerId, "results": "".join(results)}
+                for (rankingId, playerId), results in forms.items()
+            ])
+        db.session.commit()
+        log(1, "rebuildHeadToHead", f"Rebuilt head-to-head records from {processed} finished matches")
+        return processed
+    except Exception as e:
+        db.session.rollback()
+        log(4, "rebuildHeadToHead", f"Could not rebuild head-to-head records: {e}")
+        return None
+
+def createHeadToHeadTables():
+    """
+    Creates the head-to-head tables if they are missing and fills them from FinishedMatches.
+    They only hold derived data, so databases created before they existed are caught up on startup.
+
+    Returns:
+        bool: True if the tables were created
+    """
+    try:
+        existingTables = inspect(db.engine).get_table_names()
+        missing = [model.__table__ for model in (HeadToHead, PlayerForm) if model.__tablename__ not in existingTables]
+        if not missing or "finished_matches" not in existingTables:
+            return False
+        db.metadata.create_all(bind=db.engine, tables=missing)
+        log(1, "createHeadToHeadTables", f"Created tables: {', '.join(table.name for table in missing)}")
+        rebuildHeadToHead()
+        return True
+    except Exception as e:
+        log(4, "createHeadToHeadTables", f"Could not create head-to-head tables: {e}")
+        return False
@@ -0,0 +1,156 @@
+from db import db, Players, PlayerRankings, PlayerBonuses, OnGoingMatches, HeadToHead, PlayerForm, LogEntries, FinishedMatches
+from logger import log
+from flask import Flask
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+import sys
+
+# =============================================================================
+# INDEXES, COLUMNS AND QUERY PLAN CHECK
+# =============================================================================
+# The indexes themselves are declared on the models in db.py, so `flask db migrate`
+# picks them up for databases managed with Flask-Migrate. createMissingIndexes()
+# adds them to existing databases that were created before they were declared,
+# addMissingColumns() does the same for added columns that have a default.
+# Running this file checks with EXPLAIN QUERY PLAN that none of the hot queries
+# falls back to a full table scan: `python indexes.py`
+
+def addMissingColumns():
+    """
+    Adds every column declared on the models that does not exist in the database yet.
+    Only nullable columns and columns with a server default can be added to filled tables,
+    others are skipped and logged. Safe to call on every startup.
+
+    Returns:
+        list: Added columns as "table.column"
+    """
+    added = []
+    try:
+        for bindKey, engine in db.engines.items():
+            inspector = inspect(engine)
+            existingTables = inspector.get_table_names()
+            for table in db.metadata.tables.values():
+                if table.info.get("bind_key") != bindKey or table.name not in existingTables:
+                    continue
+                existingColumns = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existingColumns:
+                        continue
+                    if not column.nullable and column.server_default is None:
+                        log(3, "addMissingColumns", f"Can not add column {table.name}.{column.name} without a server default")
+                        continue
+                    columnSql = CreateColumn(column).compile(dialect=engine.dialect)
+                    with engine.begin() as connection:
+                        connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {columnSql}")
+                    added.append(f"{table.name}.{column.name}")
+        if added:
+            log(1, "addMissingColumns", f"Added columns: {', '.join(added)}")
+    except Exception as e:
+        log(4, "addMissingColumns", f"Could not add missing columns: {e}")
+    return added
+
+def createMissingIndexes():
+    """
+    Creates every index declared on the models that does not exist in the database yet.
+    Safe to call on every startup.
+
+    Returns:
+        list: Names of the created indexes
+    """
+    created = []
+    try:
+        for bindKey, engine in db.engines.items():
+            inspector = inspect(engine)
+            existingTables = inspector.get_table_names()
+            for table in db.metadata.tables.values():
+                if table.info.get("bind_key") != bindKey or table.name not in existingTables:
+                    continue
+                existingIndexes = {index["name"] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in existingIndexes:
+                        index.create(bind=engine)
+                        created.append(index.name)
+        if created:
+            log(1, "createMissingIndexes", f"Created indexes: {', '.join(created)}")
+    except Exception as e:
+        log(4, "createMissingIndexes", f"Could not create missing indexes: {e}")
+    return created
+
+def getHotQueries():
+    """
+    Returns the main lookups of the service layer as (name, query) pairs.
+    Must be called inside an app context.
+    """
+    return [
+        ("ranking entry of player", PlayerRankings.query.filter_by(playerId=1, rankingId=1)),
+        ("rankings of player", PlayerRankings.query.filter_by(playerId=1)),
+        ("players of ranking by position", db.session.query(Players.id, Players.name, PlayerRankings.ranking).join(
+            PlayerRankings, Players.id == PlayerRankings.playerId
+        ).filter(PlayerRankings.rankingId == 1).order_by(PlayerRankings.ranking.asc())),
+        ("players of ranking by points", db.session.query(Players.id, Players.name, PlayerRankings.points).join(
+            PlayerRankings, Players.id == PlayerRankings.playerId
+        ).filter(PlayerRankings.rankingId == 1).order_by(PlayerRankings.points.desc())),
+        ("players of ranking by rating", db.session.query(Players.id, Players.name, PlayerRankings.rating).join(
+            PlayerRankings, Players.id == PlayerRankings.playerId
+        ).filter(PlayerRankings.rankingId == 1).order_by(PlayerRankings.rating.desc())),
+        ("player at position", PlayerRankings.query.filter_by(ranking=2, rankingId=1)),
+        ("active matches of ranking", OnGoingMatches.query.filter_by(rankingId=1).order_by(OnGoingMatches.timeStarted.asc())),
+        ("matches as challenger", OnGoingMatches.query.filter_by(challengerId=1)),
+        ("matches as defender", OnGoingMatches.query.filter_by(defenderId=1)),
+        ("bonus of player", PlayerBonuses.query.filter_by(playerId=1)),
+        ("head-to-head of pair", HeadToHead.query.filter_by(rankingId=1, playerId=1, opponentId=2)),
+        ("opponents of player", HeadToHead.query.filter_by(rankingId=1, playerId=1)),
+        ("recent form of ranking", PlayerForm.query.filter_by(rankingId=1)),
+        ("finished matches of ranking", FinishedMatches.query.filter(
+            FinishedMatches.rankingId == 1, FinishedMatches.timeFinished >= "2000-01-01"
+        ).order_by(FinishedMatches.timeFinished.asc(), FinishedMatches.id.asc())),
+        ("finished matches by date", FinishedMatches.query.filter(
+            FinishedMatches.timeFinished >= "2000-01-01"
+        ).order_by(FinishedMatches.timeFinished.asc(), FinishedMatches.id.asc())),
+        ("logs before date", LogEntries.query.filter(LogEntries.timestamp < "2000-01-01")),
+        ("logs of level", LogEntries.query.filter_by(level="Error").order_by(LogEntries.timestamp.desc(), LogEntries.id.desc())),
+        ("logs of origin", LogEntries.query.filter_by(origin="endmatch").order_by(LogEntries.timestamp.desc(), LogEntries.id.desc())),
+    ]
+
+def getQueryPlan(query):
+    """
+    Runs EXPLAIN QUERY PLAN for a query on the engine of its table.
+
+    Returns:
+        list: Detail strings of the plan rows
+    """
+    statement = query.statement
+    engine = db.session.get_bind(mapper=query.column_descriptions[0]["entity"])
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+def checkQueryPlans():
+    """
+    Checks that no hot query scans a whole table.
+
+    Returns:
+        list: (name, plan) pairs of the queries that fall back to a full table scan
+    """
+    failures = []
+    for name, query in getHotQueries():
+        plan = getQueryPlan(query)
+        if any(detail.startswith("SCAN ") and " USING " not in detail for detail in plan):
+            failures.append((name, plan))
+    return failures
+
+if __name__ == '__main__':
+    checkApp = Flask(__name__)
+    checkApp.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    checkApp.config['SQLALCHEMY_BINDS'] = {'logs': 'sqlite://'}
+    db.init_app(checkApp)
+    with checkApp.app_context():
+        db.create_all()
+        failures = checkQueryPlans()
+        for name, query in getHotQueries():
+            print(f"{name}: {' | '.join(getQueryPlan(query))}")
+    if failures:
+        for name, plan in failures:
+            print(f"FULL TABLE SCAN in '{name}': {plan}")
+        sys.exit(1)
+    print("All hot queries use an index")
@@ -0,0 +1,239 @@
+from db import db
+from logger import setLogCallHook
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+import bisect
+import os
+import threading
+import time
+
+# =============================================================================
+# REQUEST INSTRUMENTATION
+# =============================================================================
+# Opt-in with INSTRUMENTATION=1. For every request it records the number of SQL
+# statements and their time (ranking and log database separately), the
+# template render time and the number of log() calls, and adds them to
+# per-route histograms. Every response gets a Server-Timing header with the
+# values of that request, the histograms are served by /trainer/stats.
+# log() only enqueues records for the background writer, so log calls are
+# counted without a duration; logdb is the time of queries the request itself
+# runs on the log database (e.g. the log browser).
+# When disabled nothing is registered, so there is no overhead at all. When
+# enabled a statement costs two clock reads and a request one locked update of
+# fixed size buckets, cheap enough to stay on in production.
+
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION', '0').lower() in ('1', 'true', 'yes')
+DURATION_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)  # Upper bounds in ms, plus one overflow bucket
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)                          # Upper bounds in statements, plus overflow
+
+class RouteStats:
+    """
+    Histograms and totals of all requests to one route.
+    """
+    __slots__ = ("requests", "errors", "totalTime", "dbTime", "logDbTime", "renderTime", "queries", "logDbQueries",
+                 "logCalls", "maxTime", "maxQueries", "durationBuckets", "queryBuckets")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.totalTime = 0.0
+        self.dbTime = 0.0
+        self.logDbTime = 0.0
+        self.renderTime = 0.0
+        self.queries = 0
+        self.logDbQueries = 0
+        self.logCalls = 0
+        self.maxTime = 0.0
+        self.maxQueries = 0
+        self.durationBuckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.queryBuckets = [0] * (len(QUERY_BUCKETS) + 1)
+
+    def add(self, sample, status):
+        self.requests += 1
+        self.errors += 1 if status >= 500 else 0
+        self.totalTime += sample.totalTime
+        self.dbTime += sample.dbTime
+        self.logDbTime += sample.logDbTime
+        self.renderTime += sample.renderTime
+        self.queries += sample.queries
+        self.logDbQueries += sample.logDbQueries
+        self.logCalls += sample.logCalls
+        self.maxTime = max(self.maxTime, sample.totalTime)
+        self.maxQueries = max(self.maxQueries, sample.queries)
+        self.durationBuckets[bisect.bisect_left(DURATION_BUCKETS, sample.totalTime)] += 1
+        self.queryBuckets[bisect.bisect_left(QUERY_BUCKETS, sample.queries)] += 1
+
+    def toDict(self):
+        requests = self.requests or 1
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avgMs": round(self.totalTime / requests, 3),
+            "p50Ms": getBucketPercentile(self.durationBuckets, DURATION_BUCKETS, 50, self.maxTime),
+            "p95Ms": getBucketPercentile(self.durationBuckets, DURATION_BUCKETS, 95, self.maxTime),
+            "p99Ms": getBucketPercentile(self.durationBuckets, DURATION_BUCKETS, 99, self.maxTime),
+            "maxMs": round(self.maxTime, 3),
+            "avgDbMs": round(self.dbTime / requests, 3),
+            "avgRenderMs": round(self.renderTime / requests, 3),
+            "avgQueries": round(self.queries / requests, 2),
+            "p95Queries": getBucketPercentile(self.queryBuckets, QUERY_BUCKETS, 95, self.maxQueries),
+            "maxQueries": self.maxQueries,
+            "avgLogCalls": round(self.logCalls / requests, 2),
+            "avgLogDbQueries": round(self.logDbQueries / requests, 2),
+            "avgLogDbMs": round(self.logDbTime / requests, 3),
+            "durationBuckets": list(zip(list(DURATION_BUCKETS) + ["+Inf"], self.durationBuckets)),
+            "queryBuckets": list(zip(list(QUERY_BUCKETS) + ["+Inf"], self.queryBuckets)),
+        }
+
+class RequestSample:
+    """
+    Values collected during one request, kept on flask.g.
+    """
+    __slots__ = ("startedAt", "totalTime", "dbTime", "logDbTime", "renderTime", "renderStartedAt",
+                 "queries", "logDbQueries", "logCalls")
+
+    def __init__(self):
+        self.startedAt = time.perf_counter()
+        self.totalTime = 0.0
+        self.dbTime = 0.0
+        self.logDbTime = 0.0
+        self.renderTime = 0.0
+        self.renderStartedAt = None
+        self.queries = 0
+        self.logDbQueries = 0
+        self.logCalls = 0
+
+_routeStats = {}         # "METHOD rule" -> RouteStats
+_statsLock = threading.Lock()
+_statsSince = time.time()
+
+def getBucketPercentile(buckets, bounds, percent, maximum):
+    """
+    Estimates a percentile from histogram buckets as the upper bound of the bucket it falls in.
+    The overflow bucket reports the observed maximum.
+    """
+    total = sum(buckets)
+    if not total:
+        return None
+    threshold = total * percent / 100
+    seen = 0
+    for index, count in enumerate(buckets):
+        seen += count
+        if seen >= threshold:
+            return bounds[index] if index < len(bounds) else round(maximum, 3)
+    return round(maximum, 3)
+
+def _getSample():
+    if not has_request_context():
+        return None
+    return g.get("instrumentation")
+
+def _beforeCursorExecute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, which is discarded with the statement even if it fails
+    if context is not None:
+        context._instrumentationStart = time.perf_counter()
+
+def _afterCursorExecute(conn, cursor, statement, parameters, context, executemany, isLogDatabase=False):
+    startedAt = getattr(context, "_instrumentationStart", None)
+    if startedAt is None:
+        return
+    elapsed = (time.perf_counter() - startedAt) * 1000
+    sample = _getSample()
+    if sample is None:
+        return
+    if isLogDatabase:
+        sample.logDbQueries += 1
+        sample.logDbTime += elapsed
+    else:
+        sample.queries += 1
+        sample.dbTime += elapsed
+
+def _afterLogCursorExecute(*args):
+    _afterCursorExecute(*args, isLogDatabase=True)
+
+def _countLogCall():
+    sample = _getSample()
+    if sample is not None:
+        sample.logCalls += 1
+
+def _beforeRender(sender, template, context, **extra):
+    sample = _getSample()
+    if sample is not None:
+        sample.renderStartedAt = time.perf_counter()
+
+def _afterRender(sender, template, context, **extra):
+    sample = _getSample()
+    if sample is not None and sample.renderStartedAt is not None:
+        sample.renderTime += (time.perf_counter() - sample.renderStartedAt) * 1000
+        sample.renderStartedAt = None
+
+def _startRequest():
+    g.instrumentation = RequestSample()
+
+def _finishRequest(response):
+    sample = g.pop("instrumentation", None)
+    if sample is None:
+        return response
+    sample.totalTime = (time.perf_counter() - sample.startedAt) * 1000
+    route = f"{request.method} {request.url_rule.rule if request.url_rule else '<unmatched>'}"
+    with _statsLock:
+        stats = _routeStats.get(route)
+        if stats is None:
+            stats = _routeStats[route] = RouteStats()
+        stats.add(sample, response.status_code)
+    response.headers["Server-Timing"] = (
+        f'db;dur={sample.dbTime:.2f};desc="{sample.queries} queries", '
+        f'tpl;dur={sample.renderTime:.2f};desc="render", '
+        f'logdb;dur={sample.logDbTime:.2f};desc="{sample.logDbQueries} log database queries", '
+        f'log;desc="{sample.logCalls} log calls", '
+        f'total;dur={sample.totalTime:.2f}'
+    )
+    return response
+
+def initInstrumentation(app):
+    """
+    Registers the request hooks and SQLAlchemy events if instrumentation is enabled.
+    Must be called after db.init_app.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        bool: True if instrumentation was enabled
+    """
+    if not INSTRUMENTATION_ENABLED:
+        return False
+    with app.app_context():
+        for bindKey, engine in db.engines.items():
+            event.listen(engine, "before_cursor_execute", _beforeCursorExecute)
+            event.listen(engine, "after_cursor_execute", _afterLogCursorExecute if bindKey == "logs" else _afterCursorExecute)
+    before_render_template.connect(_beforeRender, app)
+    template_rendered.connect(_afterRender, app)
+    setLogCallHook(_countLogCall)
+    app.before_request(_startRequest)
+    app.after_request(_finishRequest)
+    return True
+
+def getInstrumentationStats(reset=False):
+    """
+    Returns the collected per-route statistics.
+
+    Args:
+        reset: Clear the statistics after reading them (optional)
+
+    Returns:
+        dict: Instrumentation state, collection start and stats per route, slowest average first.
+              Buckets are [upper bound, count] pairs.
+    """
+    global _statsSince
+    with _statsLock:
+        routes = [{"route": route, **stats.toDict()} for route, stats in _routeStats.items()]
+        since = _statsSince
+        if reset:
+            _routeStats.clear()
+            _statsSince = time.time()
+    return {
+        "enabled": INSTRUMENTATION_ENABLED,
+        "since": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(since)),
+        "routes": sorted(routes, key=lambda route: -route["avgMs"]),
+    }
@@ -0,0 +1,190 @@
+from db import db, Players, FinishedMatches
+from logger import log
+from sqlalchemy import event, func
+import bisect
+import os
+import threading
+
+# =============================================================================
+# LIFETIME LEADERBOARD
+# =============================================================================
+# All players ordered by lifetime wins (then player id), with win rate and set
+# ratio computed once instead of in the template on every request.
+# The leaderboard is built with one query on first use and then kept up to date
+# incrementally: increaseWinsLosses and changeSetStats record the changed
+# players on the session, and the new values are applied once the session
+# commits (a rollback discards them). Changes that do not go through those
+# functions (manual edits, new or deleted players) call invalidateLeaderboard.
+# rebuildLifetimeStats recomputes the counters on Players from FinishedMatches.
+
+LEADERBOARD_TOP_N = int(os.environ.get('LEADERBOARD_TOP_N', 100))
+
+class LifetimeStats:
+    """
+    Lifetime stats of one player with precomputed ratios.
+    """
+    __slots__ = ("id", "name", "wins", "losses", "setsWon", "setsLost", "matches", "winRate", "setRatio")
+
+    def __init__(self, id, name, wins, losses, setsWon, setsLost):
+        self.id = id
+        self.name = name
+        self.wins = int(wins or 0)
+        self.losses = int(losses or 0)
+        self.setsWon = int(setsWon or 0)
+        self.setsLost = int(setsLost or 0)
+        self.matches = self.wins + self.losses
+        self.winRate = self.wins / self.matches * 100 if self.wins and self.matches else None
+        self.setRatio = self.setsWon / self.setsLost if self.setsLost else None
+
+    def sortKey(self):
+        return (-self.wins, self.id)
+
+_entries = None          # List of LifetimeStats in leaderboard order, None until built
+_sortKeys = []           # sortKey() of _entries, for bisect
+_byId = {}               # playerId -> LifetimeStats
+_leaderboardLock = threading.Lock()
+
+def buildLeaderboard():
+    """
+    Loads the lifetime stats of all players with one query and orders them.
+
+    Returns:
+        int: Number of players on the leaderboard
+    """
+    global _entries, _sortKeys, _byId
+    rows = db.session.query(
+        Players.id, Players.name, Players.wins, Players.losses, Players.setsWon, Players.setsLost
+    ).all()
+    entries = sorted((LifetimeStats(*row) for row in rows), key=LifetimeStats.sortKey)
+    with _leaderboardLock:
+        _entries = entries
+        _sortKeys = [entry.sortKey() for entry in entries]
+        _byId = {entry.id: entry for entry in entries}
+    log(1, "buildLeaderboard", f"Built lifetime leaderboard with {len(entries)} players")
+    return len(entries)
+
+def invalidateLeaderboard():
+    """
+    Drops the leaderboard, it is built again on next use.
+    """
+    global _entries
+    with _leaderboardLock:
+        _entries = None
+
+def getLeaderboard(limit=None):
+    """
+    Returns the top of the lifetime leaderboard.
+
+    Args:
+        limit: Maximum number of players (optional, defaults to LEADERBOARD_TOP_N, 0 for all)
+
+    Returns:
+        tuple: (list of LifetimeStats in leaderboard order, total number of players)
+    """
+    if limit is None:
+        limit = LEADERBOARD_TOP_N
+    with _leaderboardLock:
+        entries = _entries
+    if entries is None:
+        buildLeaderboard()
+        with _leaderboardLock:
+            entries = _entries or []
+    return (entries[:limit] if limit else list(entries), len(entries))
+
+def recordLifetimeChange(player):
+    """
+    Remembers a player whose lifetime stats changed in the current transaction.
+    The leaderboard is updated when the session commits.
+
+    Args:
+        player: Players object with the new values
+
+    Returns:
+        None
+    """
+    db.session.info.setdefault("lifetimeChanges", {})[player.id] = player
+
+def _applyLifetimeChanges(session):
+    """
+    Moves the players changed by a committed transaction to their new place.
+    """
+    global _entries
+    changes = session.info.pop("lifetimeChanges", None)
+    if not changes:
+        return
+    with _leaderboardLock:
+        if _entries is None:
+            return
+        try:
+            for playerId, values in changes.items():
+                old = _byId.get(playerId)
+                if old is not None:
+                    index = bisect.bisect_left(_sortKeys, old.sortKey())
+                    del _entries[index]
+                    del _sortKeys[index]
+                entry = LifetimeStats(playerId, values["name"], values["wins"], values["losses"],
+                                      values["setsWon"], values["setsLost"])
+                index = bisect.bisect_left(_sortKeys, entry.sortKey())
+                _entries.insert(index, entry)
+                _sortKeys.insert(index, entry.sortKey())
+                _byId[playerId] = entry
+        except Exception:
+            _entries = None  # Rebuilt from the database on next use
+
+def _snapshotLifetimeChanges(session):
+    """
+    Copies the values of the changed players before the commit expires them.
+    """
+    changes = session.info.get("lifetimeChanges")
+    if not changes:
+        return
+    for playerId, player in list(changes.items()):
+        if isinstance(player, Players):
+            changes[playerId] = {"name": player.name, "wins": player.wins, "losses": player.losses,
+                                 "setsWon": player.setsWon, "setsLost": player.setsLost}
+
+def _discardLifetimeChanges(session, previousTransaction=None):
+    session.info.pop("lifetimeChanges", None)
+
+event.listen(db.session, "before_commit", _snapshotLifetimeChanges)
+event.listen(db.session, "after_commit", _applyLifetimeChanges)
+event.listen(db.session, "after_soft_rollback", _discardLifetimeChanges)
+
+def rebuildLifetimeStats():
+    """
+    Recomputes wins, losses and sets of every player from FinishedMatches with grouped queries
+    and rebuilds the leaderboard. Manual corrections of those counters are overwritten.
+
+    Returns:
+        int: Number of updated players, None on error
+    """
+    try:
+        wins = dict(db.session.query(FinishedMatches.winnerId, func.count()).group_by(FinishedMatches.winnerId).all())
+        matches = {}
+        sets = {}
+        for playerColumn, ownScore, otherScore in (
+            (FinishedMatches.challengerId, FinishedMatches.challengerScore, FinishedMatches.defenderScore),
+            (FinishedMatches.defenderId, FinishedMatches.defenderScore, FinishedMatches.challengerScore),
+        ):
+            rows = db.session.query(
+                playerColumn, func.count(), func.coalesce(func.sum(ownScore), 0), func.coalesce(func.sum(otherScore), 0)
+            ).group_by(playerColumn).all()
+            for playerId, count, setsWon, setsLost in rows:
+                matches[playerId] = matches.get(playerId, 0) + count
+                won, lost = sets.get(playerId, (0, 0))
+                sets[playerId] = (won + setsWon, lost + setsLost)
+
+        updated = 0
+        for player in Players.query.all():
+            player.wins = wins.get(player.id, 0)
+            player.losses = matches.get(player.id, 0) - player.wins
+            player.setsWon, player.setsLost = sets.get(player.id, (0, 0))
+            updated += 1
+        db.session.commit()
+        invalidateLeaderboard()
+        log(1, "rebuildLifetimeStats", f"Recomputed lifetime stats of {updated} players from finished matches")
+        return updated
+    except Exception as e:
+        db.session.rollback()
+        log(4, "rebuildLifetimeStats", f"Could not recompute lifetime stats: {e}")
+        return None
@@ -0,0 +1,170 @@
+from logger import log
+from metrics import registerGauge
+import json
+import os
+import queue
+import threading
+
+# =============================================================================
+# LIVE FEED (SERVER-SENT EVENTS)
+# =============================================================================
+# Viewer and trainer pages keep one open /live/<rankingId> connection and patch
+# the page when an event arrives, instead of reloading the whole page.
+# The service layer publishes after its commits; every subscriber has its own
+# bounded queue, a client that stops reading is dropped instead of slowing
+# down the publisher. Events:
+#   standings     positions, points and stats of all players of the ranking
+#   matchStarted  a new challenge of the ranking
+#   matchFinished result of a challenge of the ranking
+#   rankingEnded  the ranking was ended
+#   reload        the page changed in a way that can not be patched
+# Connections are idle except for a keepalive comment every LIVE_KEEPALIVE seconds.
+
+LIVE_KEEPALIVE = float(os.environ.get('LIVE_KEEPALIVE', 25))
+LIVE_MAX_SUBSCRIBERS = int(os.environ.get('LIVE_MAX_SUBSCRIBERS', 500))
+LIVE_QUEUE_SIZE = int(os.environ.get('LIVE_QUEUE_SIZE', 32))
+
+_subscribers = {}        # rankingId -> set of queues
+_lastStandings = {}      # rankingId -> last published standings payload
+_eventIds = {}           # rankingId -> id of the last published event
+_subscribersLock = threading.Lock()
+
+def getSubscriberCount(rankingId=None):
+    """
+    Returns the number of open live connections of a ranking, or of all rankings.
+    """
+    with _subscribersLock:
+        if rankingId is None:
+            return sum(len(subscribers) for subscribers in _subscribers.values())
+        return len(_subscribers.get(int(rankingId), ()))
+
+def getFollowedRankings():
+    """
+    Returns the IDs of the rankings with at least one open live connection.
+    """
+    with _subscribersLock:
+        return list(_subscribers)
+
+def subscribe(rankingId):
+    """
+    Registers a new live connection for a ranking.
+
+    Args:
+        rankingId: ID of the ranking to follow
+
+    Returns:
+        queue.Queue: Queue receiving the encoded events, or None if the subscriber limit is reached
+    """
+    with _subscribersLock:
+        if sum(len(subscribers) for subscribers in _subscribers.values()) >= LIVE_MAX_SUBSCRIBERS:
+            return None
+        subscriberQueue = queue.Queue(maxsize=LIVE_QUEUE_SIZE)
+        _subscribers.setdefault(int(rankingId), set()).add(subscriberQueue)
+        return subscriberQueue
+
+def unsubscribe(rankingId, subscriberQueue):
+    """
+    Removes a live connection. Does nothing if it was already removed.
+    """
+    with _subscribersLock:
+        subscribers = _subscribers.get(int(rankingId))
+        if subscribers is None:
+            return
+        subscribers.discard(subscriberQueue)
+        if not subscribers:
+            _subscribers.pop(int(rankingId), None)
+            _lastStandings.pop(int(rankingId), None)
+
+def publishEvent(rankingId, eventType, data=None):
+    """
+    Sends an event to every live connection of a ranking, or of all rankings if no rankingId is given.
+    Call after the change was committed.
+
+    Args:
+        rankingId: ID of the ranking the event belongs to (optional)
+        eventType: Name of the event, e.g. "matchFinished"
+        data: JSON serializable payload (optional)
+
+    Returns:
+        int: Number of connections the event was sent to
+    """
+    sent = 0
+    dropped = 0
+    with _subscribersLock:
+        rankingIds = list(_subscribers) if rankingId is None else [int(rankingId)]
+        for targetId in rankingIds:
+            subscribers = _subscribers.get(targetId)
+            if not subscribers:
+                continue
+            eventId = _eventIds.get(targetId, 0) + 1
+            _eventIds[targetId] = eventId
+            message = f"id: {eventId}\nevent: {eventType}\ndata: {json.dumps(data, default=str)}\n\n"
+            for subscriberQueue in list(subscribers):
+                try:
+                    subscriberQueue.put_nowait(message)
+                    sent += 1
+                except queue.Full:
+                    # The client stopped reading, its stream ends and the browser reconnects
+                    subscribers.discard(subscriberQueue)
+                    dropped += 1
+    if dropped:
+        log(2, "publishEvent", f"Dropped {dropped} live connections that fell behind")
+    return sent
+
+def publishStandings(rankingId):
+    """
+    Publishes the current standings of a ranking if anybody follows it and they changed
+    since the last published standings. Loads the ranking with one query.
+
+    Args:
+        rankingId: ID of the ranking
+
+    Returns:
+        None
+    """
+    if not getSubscriberCount(rankingId):
+        return
+    from services import getPlayersOfRanking  # services imports this module
+    try:
+        players = getPlayersOfRanking(rankingId)
+        standings = [
+            {"id": player.id, "position": player.position, "ranking": player.ranking, "points": player.points,
+             "wins": player.wins, "losses": player.losses, "setsWon": player.setsWon, "setsLost": player.setsLost,
+             "rating": player.rating, "ratingDeviation": player.ratingDeviation}
+            for player in players
+        ]
+    except Exception as e:
+        log(3, "publishStandings", f"Could not load standings of ranking {rankingId}: {e}")
+        return
+    with _subscribersLock:
+        if _lastStandings.get(int(rankingId)) == standings:
+            return
+        _lastStandings[int(rankingId)] = standings
+    publishEvent(rankingId, "standings", {"players": standings})
+
+def streamEvents(rankingId, subscriberQueue):
+    """
+    Generator for the body of a text/event-stream response. Unsubscribes when the client disconnects.
+
+    Args:
+        rankingId: ID of the followed ranking
+        subscriberQueue: Queue returned by subscribe
+
+    Yields:
+        str: Encoded events and keepalive comments
+    """
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                yield subscriberQueue.get(timeout=LIVE_KEEPALIVE)
+            except queue.Empty:
+                # Detects closed connections and keeps proxies from timing out
+                yield ": keepalive\n\n"
+                with _subscribersLock:
+                    if subscriberQueue not in _subscribers.get(int(rankingId), ()):
+                        return
+    finally:
+        unsubscribe(rankingId, subscriberQueue)
+
+registerGauge("dreamrankr_live_subscribers", "Open live connections", getSubscriberCount)
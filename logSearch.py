@@ -0,0 +1,201 @@
+from db import db, LogEntries
+from logger import log, getLogEngine
+from dataExport import streamRows, parseDateArg
+from sqlalchemy import and_, or_
+import base64
+import datetime as dt
+import os
+
+# =============================================================================
+# LOG SEARCH AND EXPORT
+# =============================================================================
+# The trainer log browser filters by level, origin, time range and message text
+# and pages with a keyset cursor on (timestamp, id), newest first, so every page
+# is one indexed range read no matter how deep the user pages:
+# - level or origin filters use ix_log_entries_level_timestamp / _origin_timestamp
+# - message text uses the SQLite FTS5 table log_entries_fts, kept in sync with
+#   log_entries by triggers; without FTS5 (or LOG_FTS=0) it falls back to LIKE
+# Exports stream the matching rows with dataExport.streamRows, the table is
+# never loaded into memory.
+
+LOG_FTS = os.environ.get('LOG_FTS', '1').lower() not in ('0', 'false', 'no')
+LOG_PAGE_SIZE = 50
+LOG_LEVELS = ["Debug", "Information", "Authentication", "Warning", "Error"]
+EXPORT_FIELDS = ["id", "timestamp", "level", "origin", "message"]
+
+_ftsAvailable = False
+
+FTS_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS log_entries_fts USING fts5(message, content='log_entries', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS log_entries_fts_insert AFTER INSERT ON log_entries BEGIN "
+    "INSERT INTO log_entries_fts(rowid, message) VALUES (new.id, new.message); END",
+    "CREATE TRIGGER IF NOT EXISTS log_entries_fts_delete AFTER DELETE ON log_entries BEGIN "
+    "INSERT INTO log_entries_fts(log_entries_fts, rowid, message) VALUES ('delete', old.id, old.message); END",
+]
+FTS_DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS log_entries_fts_insert",
+    "DROP TRIGGER IF EXISTS log_entries_fts_delete",
+    "DROP TABLE IF EXISTS log_entries_fts",
+]
+
+def createLogSearchIndex():
+    """
+    Creates the full-text index over log messages and its triggers if they are missing,
+    and fills it from the existing entries. Removes it again if LOG_FTS is disabled.
+    Safe to call on every startup. Must be called inside an app context.
+
+    Returns:
+        bool: True if full-text search is available
+    """
+    global _ftsAvailable
+    engine = getLogEngine()
+    _ftsAvailable = False
+    if engine.dialect.name != "sqlite":
+        return False
+    try:
+        with engine.begin() as connection:
+            if not LOG_FTS:
+                for statement in FTS_DROP_STATEMENTS:
+                    connection.exec_driver_sql(statement)
+                return False
+            existed = connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'log_entries_fts'"
+            ).first() is not None
+            for statement in FTS_STATEMENTS:
+                connection.exec_driver_sql(statement)
+            if not existed:
+                connection.exec_driver_sql("INSERT INTO log_entries_fts(log_entries_fts) VALUES ('rebuild')")
+        _ftsAvailable = True
+        if not existed:
+            log(1, "createLogSearchIndex", "Created full-text index of log messages")
+    except Exception as e:
+        log(3, "createLogSearchIndex", f"Full-text search of logs is not available, falling back to LIKE: {e}")
+    return _ftsAvailable
+
+def isFullTextSearchAvailable():
+    return _ftsAvailable
+
+def getFtsQuery(text):
+    """
+    Turns free text into an FTS5 query matching entries that contain every word,
+    the last word also as prefix. Quotes every word, so FTS5 syntax in the input has no effect.
+    """
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+
+def encodeLogCursor(timestamp, entryId):
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{entryId}".encode()).decode().rstrip("=")
+
+def decodeLogCursor(cursor):
+    """
+    Returns the (timestamp, id) stored in a cursor, or None if no cursor was given.
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    if not cursor:
+        return None
+    try:
+        timestamp, entryId = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|")
+        return dt.datetime.fromisoformat(timestamp), int(entryId)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def getLogFilters(args):
+    """
+    Reads and validates the log filters from request arguments.
+
+    Args:
+        args: request.args
+
+    Returns:
+        dict: level, origin, text, since and until, None for unset filters
+
+    Raises:
+        ValueError: If a filter has an invalid value
+    """
+    filters = {"level": None, "origin": None, "text": None, "since": None, "until": None}
+    level = args.get('level') or None
+    if level is not None and level not in LOG_LEVELS:
+        raise ValueError(f"Unknown level '{level}'")
+    filters["level"] = level
+    filters["origin"] = (args.get('origin') or "").strip().lower() or None  # Stored lowercase by log()
+    filters["text"] = (args.get('text') or "").strip() or None
+    for name in ("since", "until"):
+        filters[name] = parseDateArg(args.get(name), name)
+    return filters
+
+def buildLogQuery(level=None, origin=None, text=None, since=None, until=None):
+    """
+    Returns a select of the log entries matching the filters, without ordering.
+    Times are compared as stored, in UTC.
+    """
+    statement = db.select(LogEntries.id, LogEntries.timestamp, LogEntries.level, LogEntries.origin, LogEntries.message)
+    if level:
+        statement = statement.where(LogEntries.level == level)
+    if origin:
+        statement = statement.where(LogEntries.origin == origin)
+    if since:
+        statement = statement.where(LogEntries.timestamp >= since)
+    if until:
+        statement = statement.where(LogEntries.timestamp < until)
+    if text:
+        ftsQuery = getFtsQuery(text)
+        if _ftsAvailable and ftsQuery:
+            matches = db.text("SELECT rowid FROM log_entries_fts WHERE log_entries_fts MATCH :ftsQuery").bindparams(
+                ftsQuery=ftsQuery
+            ).columns(db.column("rowid", db.Integer))
+            statement = statement.where(LogEntries.id.in_(matches))
+        else:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            statement = statement.where(LogEntries.message.like(pattern, escape="\\"))
+    return statement
+
+def searchLogs(filters, cursor=None, limit=LOG_PAGE_SIZE):
+    """
+    Returns one page of log entries, newest first.
+
+    Args:
+        filters: dict from getLogFilters
+        cursor: nextCursor of the previous page (optional)
+        limit: Maximum number of entries
+
+    Returns:
+        tuple: (list of rows, nextCursor or None)
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    statement = buildLogQuery(**filters)
+    after = decodeLogCursor(cursor)
+    if after:
+        timestamp, entryId = after
+        statement = statement.where(or_(
+            LogEntries.timestamp < timestamp,
+            and_(LogEntries.timestamp == timestamp, LogEntries.id < entryId)
+        ))
+    statement = statement.order_by(LogEntries.timestamp.desc(), LogEntries.id.desc()).limit(limit + 1)
+    with getLogEngine().connect() as connection:
+        rows = connection.execute(statement).all()
+    nextCursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        nextCursor = encodeLogCursor(rows[-1].timestamp, rows[-1].id)
+    return rows, nextCursor
+
+def streamLogExport(engine, filters, exportFormat):
+    """
+    Body of a log export, oldest entry first.
+
+    Args:
+        engine: Engine of the log database, read before the request context ends
+        filters: dict from getLogFilters
+        exportFormat: "ndjson" or "csv"
+
+    Returns:
+        generator: str chunks of the export
+    """
+    statement = buildLogQuery(**filters).order_by(LogEntries.timestamp.asc(), LogEntries.id.asc())
+    return streamRows(engine, statement, EXPORT_FIELDS, exportFormat)
@@ -1,4 +1,169 @@
 from db import db, LogEntries
+from metrics import incrementCounter, registerGauge
+from datetime import datetime, timezone
+import atexit
+import os
+import queue
+import random
+import threading
+import time
+
+# =============================================================================
+# BACKGROUND LOG WRITER
+# =============================================================================
+# log() only puts records on an in-memory queue. A writer thread drains the
+# queue and inserts the records in bulk once LOG_BATCH_SIZE records are waiting
+# or LOG_FLUSH_INTERVAL seconds have passed, whichever happens first.
+# Log writes use their own connection, so they never commit the caller's session.
+LOG_BATCH_SIZE = int(os.environ.get('LOG_BATCH_SIZE', 200))
+LOG_FLUSH_INTERVAL = float(os.environ.get('LOG_FLUSH_INTERVAL', 2.0))
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+logQueue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_writerApp = None
+_writerThread = None
+_writerStop = threading.Event()
+_writeLock = threading.Lock()
+_logCallHook = None  # Called on every log() call, set by instrumentation
+registerGauge("dreamrankr_log_queue_depth", "Log records waiting for the background writer", logQueue.qsize)
+
+# =============================================================================
+# LEVEL THRESHOLD AND SAMPLING
+# =============================================================================
+# Decides whether a log() call is kept before its record is built or its
+# message is formatted, so filtered calls in loops cost one dict lookup.
+#   LOG_MIN_LEVEL        lowest kept level (0 debug, 1 info, 3 warning, 4 error),
+#                        authentication records (2) are always kept
+#   LOG_LEVEL_OVERRIDES  per origin minimum level, e.g. "getmatchesplayed=3,startmatch=0"
+#   LOG_SAMPLING         per origin sampling of kept records, either a probability
+#                        ("compareFromStrForBonus=0.01") or a rate per second or
+#                        minute ("getrankingandpoints=10/s"), rates are approximate
+# Messages can be passed lazily, as format string with arguments
+# (log(1, "origin", "Player {} in ranking {}", playerId, rankingId)) or as a
+# callable returning the message; they are only formatted for kept records.
+LOG_LEVEL_RANKS = {0: 0, "debug": 0, 1: 1, "info": 1, 2: 2, "auth": 2, 3: 3, "warning": 3, 4: 4, "error": 4}
+AUTHENTICATION_RANK = 2
+
+def parseOriginSettings(text):
+    """
+    Parses "origin=value,origin=value" into a dict with lowercase origins.
+    """
+    settings = {}
+    for item in (text or "").split(","):
+        if "=" in item:
+            origin, value = item.split("=", 1)
+            if origin.strip() and value.strip():
+                settings[origin.strip().lower()] = value.strip()
+    return settings
+
+class RateSampler:
+    """
+    Keeps at most `limit` records per window of `seconds`. Not locked, may keep a few more under contention.
+    """
+    __slots__ = ("limit", "seconds", "windowStart", "count")
+
+    def __init__(self, limit, seconds):
+        self.limit = limit
+        self.seconds = seconds
+        self.windowStart = 0.0
+        self.count = 0
+
+    def __call__(self):
+        now = time.monotonic()
+        if now - self.windowStart >= self.seconds:
+            self.windowStart = now
+            self.count = 0
+        self.count += 1
+        return self.count <= self.limit
+
+def createSampler(setting):
+    """
+    Returns a callable deciding per record whether it is kept, from "0.1" or "10/s" / "10/m".
+    Returns None for settings that keep everything.
+    """
+    if "/" in setting:
+        limit, unit = setting.split("/", 1)
+        return RateSampler(int(limit), 60.0 if unit.strip().lower() in ("m", "min", "minute") else 1.0)
+    probability = float(setting)
+    if probability >= 1:
+        return None
+    return lambda: random.random() < probability
+
+_minLevel = 1
+_levelOverrides = {}
+_samplers = {}
+_decisions = {}          # (level, origin) as passed to log() -> False, True or sampler
+
+def getLevelRank(level):
+    """
+    Converts a level as passed to log() or written in a setting ("3", "warning") to its rank 0-4.
+
+    Raises:
+        ValueError: If the level is unknown
+    """
+    if isinstance(level, str):
+        level = int(level) if level.strip().isdigit() else level.strip().lower()
+    rank = LOG_LEVEL_RANKS.get(level)
+    if rank is None:
+        raise ValueError(f"Unknown log level: {level}")
+    return rank
+
+def configureLogFilters(minLevel=None, levelOverrides=None, sampling=None):
+    """
+    Sets the level threshold, per origin levels and sampling. Arguments left out are read from the environment.
+
+    Args:
+        minLevel: Lowest kept level (optional)
+        levelOverrides: Dict of origin -> minimum level or setting string (optional)
+        sampling: Dict of origin -> probability or rate setting string (optional)
+    """
+    global _minLevel, _levelOverrides, _samplers
+    if minLevel is None:
+        minLevel = os.environ.get('LOG_MIN_LEVEL', 1)
+    if levelOverrides is None:
+        levelOverrides = parseOriginSettings(os.environ.get('LOG_LEVEL_OVERRIDES'))
+    if sampling is None:
+        sampling = parseOriginSettings(os.environ.get('LOG_SAMPLING'))
+    _minLevel = getLevelRank(minLevel)
+    _levelOverrides = {origin.lower(): getLevelRank(level) for origin, level in levelOverrides.items()}
+    _samplers = {}
+    for origin, setting in sampling.items():
+        sampler = createSampler(str(setting))
+        if sampler is not None:
+            _samplers[origin.lower()] = sampler
+    _decisions.clear()
+
+def _decide(level, origin):
+    """
+    Computes and caches whether records of a level and origin are kept.
+    """
+    rank = LOG_LEVEL_RANKS.get(level)
+    originKey = origin.lower() if isinstance(origin, str) else origin
+    if rank is None:
+        decision = True  # Unknown levels are kept and stored as "Unknown"
+    else:
+        minimum = _levelOverrides.get(originKey)
+        if minimum is None:
+            minimum = _minLevel
+            if rank == AUTHENTICATION_RANK:
+                minimum = 0
+        decision = rank >= minimum
+    if decision:
+        decision = _samplers.get(originKey, True)
+    _decisions[(level, origin)] = decision
+    return decision
+
+def isLogEnabled(level, origin):
+    """
+    Returns True if a log() call with this level and origin would currently be kept.
+    Use it to skip expensive work that is only done for a log message.
+    """
+    decision = _decisions.get((level, origin))
+    if decision is None:
+        decision = _decide(level, origin)
+    return decision if decision is True or decision is False else decision()
+
+configureLogFilters()
 
 def getLevelIdentifier(level):
     """
@@ -46,15 +211,19 @@ def getOriginIdentifier(origin):
         return origin.lower()
     raise TypeError(f"Expected str in logger.py getOriginIdentifier got: {type(origin).__name__}")
 
-def log(level, origin, message):
+def log(level, origin, message, *args):
     """
-    Creates a log entry in the database with the provided information.
+    Queues a log entry for the background writer with the provided information.
+    Writes directly if the writer is not running.
+    Level threshold and sampling are checked first, filtered calls build nothing.
     Handles database errors gracefully by falling back to console output.
     
     Args:
         level: Log level (0-4 or string: 0:debug, 1:info, 2:auth, 3:warning, 4:error)
         origin: Source of the log message (function/module name)
-        message: Log message content describing the event
+        message: Log message content describing the event, a str.format string
+                 if args are given, or a callable returning the message
+        args: Arguments for the format string (optional)
         
     Returns:
         None
@@ -62,28 +231,176 @@ def log(level, origin, message):
     Raises:
         None: Exceptions are caught and handled internally
     """
+    if _logCallHook is not None:
+        _logCallHook()
+
+    decision = _decisions.get((level, origin))
+    if decision is None:
+        decision = _decide(level, origin)
+    if decision is False or (decision is not True and not decision()):
+        return
+
     # Validate that all required parameters are provided
-    if not (level and origin and message):
+    if level is None or not origin or not message:
         print(f"ERROR: Invalid log parameters - level: {level}, origin: {origin}, message: {message}")
         return
         
     try:
-        new_LogEntry = LogEntries(
-            level=getLevelIdentifier(level),
-            origin=getOriginIdentifier(origin),
-            message=str(message)  # Ensure message is string
-        )
-        
-        db.session.add(new_LogEntry)
-        db.session.commit()
-        
+        if args:
+            message = message.format(*args)
+        elif callable(message):
+            message = message()
+        record = {
+            "timestamp": datetime.now(timezone.utc),
+            "level": getLevelIdentifier(level),
+            "origin": getOriginIdentifier(origin),
+            "message": str(message)  # Ensure message is string
+        }
     except Exception as e:
-        # Fallback to console output if database logging fails
-        print(f"ERROR writing Log to database: {str(e)}")
+        print(f"ERROR building log entry: {str(e)}")
         print(f"Failed log entry - Level: {level}, Origin: {origin}, Message: {message}")
+        return
+    incrementCounter("dreamrankr_log_records_total", (("level", record["level"]),))
+
+    if not isLogWriterRunning():
+        # No background writer (e.g. scripts or shell), write the record directly
+        writeLogRecords([record])
+        return
+
+    try:
+        logQueue.put_nowait(record)
+    except queue.Full:
+        # Writer can not keep up, flush in the calling thread instead of dropping records
+        flushLogs()
+        writeLogRecords([record])
+
+def setLogCallHook(hook):
+    """
+    Registers a callable that is called without arguments on every log() call, None removes it.
+    """
+    global _logCallHook
+    _logCallHook = hook
+
+def getLogEngine():
+    """
+    Returns the engine of the database LogEntries is stored in.
+    """
+    return db.engines[LogEntries.__bind_key__]
+
+def writeLogRecords(records, app=None):
+    """
+    Inserts a batch of log records with a single bulk insert on its own connection.
+    Falls back to console output if the database write fails.
+    
+    Args:
+        records: List of dicts with timestamp, level, origin and message
+        app: Flask app used to get the engine outside of an app context (optional)
         
-        # Attempt to rollback any partial transaction
+    Returns:
+        bool: True if the records were written, False otherwise
+    """
+    if not records:
+        return True
+    try:
+        if app is not None:
+            with app.app_context():
+                engine = getLogEngine()
+        else:
+            engine = getLogEngine()
+        with _writeLock:
+            with engine.begin() as connection:
+                connection.execute(LogEntries.__table__.insert(), records)
+        return True
+    except Exception as e:
+        # Fallback to console output if database logging fails
+        print(f"ERROR writing {len(records)} Logs to database: {str(e)}")
+        for record in records:
+            print(f"Failed log entry - Level: {record['level']}, Origin: {record['origin']}, Message: {record['message']}")
+        return False
+
+def _drainQueue(limit=None):
+    """
+    Removes up to limit records from the log queue without blocking.
+    """
+    records = []
+    while limit is None or len(records) < limit:
         try:
-            db.session.rollback()
-        except Exception as rollback_error:
-            print(f"ERROR during rollback: {str(rollback_error)}")
\ No newline at end of file
+            records.append(logQueue.get_nowait())
+        except queue.Empty:
+            break
+    return records
+
+def _logWriterLoop():
+    """
+    Main loop of the writer thread. Waits for the first record of a batch, then
+    collects records until the batch is full or the flush interval has passed.
+    """
+    while not _writerStop.is_set():
+        try:
+            first = logQueue.get(timeout=LOG_FLUSH_INTERVAL)
+        except queue.Empty:
+            continue
+        batch = [first]
+        deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+        while len(batch) < LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(logQueue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        writeLogRecords(batch, _writerApp)
+
+def isLogWriterRunning():
+    """
+    Returns True if the background log writer thread is alive.
+    """
+    return _writerThread is not None and _writerThread.is_alive()
+
+def startLogWriter(app):
+    """
+    Starts the background log writer for the given Flask app.
+    Registers a synchronous flush for interpreter shutdown.
+    
+    Args:
+        app: Flask app whose database the logs are written to
+        
+    Returns:
+        None
+    """
+    global _writerApp, _writerThread
+    if isLogWriterRunning():
+        return
+    _writerApp = app
+    _writerStop.clear()
+    _writerThread = threading.Thread(target=_logWriterLoop, name="log-writer", daemon=True)
+    _writerThread.start()
+    atexit.register(stopLogWriter)
+
+def flushLogs():
+    """
+    Synchronously writes every record that is currently waiting in the queue.
+    
+    Returns:
+        None
+    """
+    while True:
+        records = _drainQueue(LOG_BATCH_SIZE)
+        if not records:
+            return
+        writeLogRecords(records, _writerApp)
+
+def stopLogWriter():
+    """
+    Stops the background log writer and flushes the remaining records.
+    
+    Returns:
+        None
+    """
+    global _writerThread
+    _writerStop.set()
+    if _writerThread is not None:
+        _writerThread.join(timeout=LOG_FLUSH_INTERVAL + 1)
+        _writerThread = None
+    flushLogs()
\ No newline at end of file
@@ -1,28 +1,62 @@
 import os
+import threading
+from collections import OrderedDict
 import markdown
 from logger import log
 from flask import current_app as app
 
+# Rendered markdown files, keyed on (path, mtime, size, raw) so edits made outside
+# of changeMarkDownFile are picked up as well. Least recently used entries are dropped first.
+MARKDOWN_CACHE_SIZE = int(os.environ.get('MARKDOWN_CACHE_SIZE', 32))
+_renderCache = OrderedDict()
+_renderLock = threading.Lock()
+_renderer = markdown.Markdown()  # Reused between calls, markdown.Markdown is not thread safe so guarded by _renderLock
+
 def checkIfFileOrDb(contentId):
     if any(char.isalpha() for char in contentId):
         return 'file'
     return 'db'
 
+def renderMarkDown(markdownContent):
+    """
+    Converts markdown to HTML with the shared Markdown instance.
+    """
+    with _renderLock:
+        return _renderer.reset().convert(markdownContent)
+
+def invalidateMarkDownCache(filePath):
+    """
+    Drops every cached version of a markdown file.
+    """
+    with _renderLock:
+        for key in [key for key in _renderCache if key[0] == filePath]:
+            del _renderCache[key]
+
 def getMarkDownFileContent(fileName, raw):
     filePath = os.path.join(app.root_path, 'user_content', f'{fileName}.md')
 
-    if not os.path.exists(filePath):
+    try:
+        fileStat = os.stat(filePath)
+    except FileNotFoundError:
         log(4, 'getMarkDownFileContent', f"Requested file {fileName} does not exist at {filePath}")
         return None
+
+    cacheKey = (filePath, fileStat.st_mtime_ns, fileStat.st_size, bool(raw))
+    with _renderLock:
+        if cacheKey in _renderCache:
+            _renderCache.move_to_end(cacheKey)
+            return _renderCache[cacheKey]
     
     with open(filePath, 'r', encoding='utf-8') as f:
         markdownContent = f.read()
 
-    if not raw:
-        htmlContent = markdown.markdown(markdownContent)
-        return htmlContent
-    else:
-        return markdownContent
+    content = markdownContent if raw else renderMarkDown(markdownContent)
+
+    with _renderLock:
+        _renderCache[cacheKey] = content
+        while len(_renderCache) > MARKDOWN_CACHE_SIZE:
+            _renderCache.popitem(last=False)
+    return content
 
 def getMarkDownContent(contentId, raw=False):
     if checkIfFileOrDb(contentId) == 'file':
@@ -39,6 +73,7 @@ def changeMarkDownFile(fileName, content):
     try:
         with open(filePath, 'w', encoding='utf-8') as f:
             f.write(content)
+        invalidateMarkDownCache(filePath)
         log(2, 'changeMarkDownFile', f"Successfully wrote content to {filePath}")
     except Exception as e:
         log(4, 'changeMarkDownFile', f"Failed to write content to {filePath}: {e}")
@@ -0,0 +1,160 @@
+from db import db
+from sqlalchemy import event
+import threading
+import time
+
+# =============================================================================
+# METRICS
+# =============================================================================
+# Domain counters and gauges in the Prometheus text exposition format, served
+# on /metrics. Counters are sharded per thread: incrementCounter only touches
+# the dict of the calling thread, without a lock, so it costs one dict update
+# on hot paths like endMatch. Scraping sums the shards; shards of finished
+# threads are folded into one dict so their counts are kept.
+# Changes that only count once committed (e.g. ranking swaps inside a match
+# transaction) use incrementOnCommit, a rollback discards them.
+# Gauges are read from callbacks at scrape time, e.g. queue depths.
+
+COUNTERS = {
+    "dreamrankr_matches_started_total": "Challenges started, per ranking",
+    "dreamrankr_matches_finished_total": "Challenges finished with a result, per ranking",
+    "dreamrankr_matches_cancelled_total": "Challenges cancelled without a result, per ranking",
+    "dreamrankr_ranking_swaps_total": "Position swaps in standard rankings, per ranking",
+    "dreamrankr_rankings_ended_total": "Rankings that reached their end date",
+    "dreamrankr_auth_attempts_total": "Login attempts by result",
+    "dreamrankr_log_records_total": "log() records by level",
+}
+
+_shards = []             # (thread, counts) of every thread that incremented a counter
+_retired = {}            # Counts of finished threads
+_shardsLock = threading.Lock()
+_local = threading.local()
+_gauges = {}             # name -> (help, callback)
+_startTime = time.time()
+
+def _getShard():
+    try:
+        return _local.counts
+    except AttributeError:
+        counts = {}
+        with _shardsLock:
+            _retireFinishedShards()
+            _shards.append((threading.current_thread(), counts))
+        _local.counts = counts
+        return counts
+
+def _retireFinishedShards():
+    """
+    Folds the shards of finished threads into _retired. Caller holds _shardsLock.
+    """
+    alive = []
+    for thread, counts in _shards:
+        if thread.is_alive():
+            alive.append((thread, counts))
+        else:
+            for key, value in counts.items():
+                _retired[key] = _retired.get(key, 0) + value
+    _shards[:] = alive
+
+def incrementCounter(name, labels=(), amount=1):
+    """
+    Adds to a counter. Lock free, only the calling thread's shard is changed.
+
+    Args:
+        name: Name of the counter, one of COUNTERS
+        labels: Tuple of (label, value) pairs, e.g. (("ranking", "1"),)
+        amount: Amount to add (optional)
+
+    Returns:
+        None
+    """
+    counts = _getShard()
+    key = (name, labels)
+    counts[key] = counts.get(key, 0) + amount
+
+def incrementOnCommit(name, labels=(), amount=1):
+    """
+    Adds to a counter once the current session commits, nothing if it rolls back.
+    """
+    db.session.info.setdefault("pendingMetrics", []).append((name, labels, amount))
+
+def _applyPendingMetrics(session):
+    for name, labels, amount in session.info.pop("pendingMetrics", ()):
+        incrementCounter(name, labels, amount)
+
+def _discardPendingMetrics(session, previousTransaction=None):
+    session.info.pop("pendingMetrics", None)
+
+event.listen(db.session, "after_commit", _applyPendingMetrics)
+event.listen(db.session, "after_soft_rollback", _discardPendingMetrics)
+
+def registerGauge(name, help, callback):
+    """
+    Registers a gauge read at scrape time.
+
+    Args:
+        name: Name of the gauge
+        help: Description shown in the exposition
+        callback: Returns a number, or a dict of label tuples to numbers
+    """
+    _gauges[name] = (help, callback)
+
+def getCounterValues():
+    """
+    Returns the sum of all shards.
+
+    Returns:
+        dict: (name, labels) -> value
+    """
+    with _shardsLock:
+        _retireFinishedShards()
+        totals = dict(_retired)
+        shards = [counts for _, counts in _shards]
+    for counts in shards:
+        for key, value in counts.copy().items():  # copy() is atomic, the owner thread may keep writing
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+def _escapeLabelValue(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _formatSample(name, labels, value):
+    if labels:
+        labelText = ",".join(f'{label}="{_escapeLabelValue(labelValue)}"' for label, labelValue in labels)
+        return f"{name}{{{labelText}}} {value}"
+    return f"{name} {value}"
+
+def renderMetrics():
+    """
+    Renders all counters and gauges in the Prometheus text exposition format (version 0.0.4).
+
+    Returns:
+        str: Exposition text
+    """
+    values = getCounterValues()
+    byName = {}
+    for (name, labels), value in values.items():
+        byName.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, help in COUNTERS.items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(byName.get(name, [])):
+            lines.append(_formatSample(name, labels, value))
+
+    gauges = dict(_gauges)
+    gauges["dreamrankr_process_start_time_seconds"] = ("Start time of the process as unix timestamp", lambda: _startTime)
+    for name, (help, callback) in gauges.items():
+        try:
+            result = callback()
+        except Exception:
+            continue  # A failing gauge must not break the scrape
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} gauge")
+        if isinstance(result, dict):
+            for labels, value in sorted(result.items()):
+                lines.append(_formatSample(name, labels, value))
+        else:
+            lines.append(_formatSample(name, (), result))
+    return "\n".join(lines) + "\n"
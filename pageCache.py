@@ -0,0 +1,91 @@
+import datetime as dt
+import os
+import threading
+from collections import OrderedDict
+from flask import session
+from metrics import registerGauge
+
+# Rendered pages, keyed on (template, rankingId, permissionLevel, data version, hour).
+# The data version comes from rankingVersions, so a changed ranking never hits an old
+# entry; markRankingChanged also drops the entries of the ranking to free the memory early.
+# The hour is part of the key because the templates show "days left" and "x hours ago".
+# Least recently used entries are dropped first once either limit is reached.
+PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 64))
+PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+_pageCache = OrderedDict()
+_pageCacheBytes = 0
+_pageCacheLock = threading.Lock()
+
+def getPageCacheKey(template, rankingId, version):
+    """
+    Returns the cache key of a page for the current session, or None if the page
+    must not be cached because flash messages are waiting to be shown on it.
+
+    Args:
+        template: Name of the template
+        rankingId: ID of the shown ranking, None for pages over all rankings
+        version: Data version of the shown data
+
+    Returns:
+        tuple: Cache key or None
+    """
+    if '_flashes' in session:
+        return None
+    hourStamp = dt.datetime.now(dt.timezone.utc).strftime('%Y%m%d%H')
+    return (template, rankingId, session.get('permissionLevel'), version, hourStamp)
+
+def getCachedPage(cacheKey):
+    """
+    Returns the cached HTML for a key or None.
+    """
+    if cacheKey is None:
+        return None
+    with _pageCacheLock:
+        html = _pageCache.get(cacheKey)
+        if html is not None:
+            _pageCache.move_to_end(cacheKey)
+        return html
+
+def storeCachedPage(cacheKey, html):
+    """
+    Stores rendered HTML under a key returned by getPageCacheKey.
+
+    Returns:
+        str: The given HTML
+    """
+    global _pageCacheBytes
+    if cacheKey is None or len(html) > PAGE_CACHE_MAX_BYTES:
+        return html
+    with _pageCacheLock:
+        previous = _pageCache.pop(cacheKey, None)
+        if previous is not None:
+            _pageCacheBytes -= len(previous)
+        _pageCache[cacheKey] = html
+        _pageCacheBytes += len(html)
+        while len(_pageCache) > PAGE_CACHE_SIZE or _pageCacheBytes > PAGE_CACHE_MAX_BYTES:
+            _, dropped = _pageCache.popitem(last=False)
+            _pageCacheBytes -= len(dropped)
+    return html
+
+def invalidatePageCache(rankingId=None):
+    """
+    Drops the cached pages of a ranking and the pages over all rankings,
+    or every cached page if no rankingId is given.
+
+    Args:
+        rankingId: ID of the changed ranking (optional)
+
+    Returns:
+        None
+    """
+    global _pageCacheBytes
+    with _pageCacheLock:
+        if rankingId is None:
+            _pageCache.clear()
+            _pageCacheBytes = 0
+            return
+        for key in [key for key in _pageCache if key[1] is None or key[1] == rankingId]:
+            _pageCacheBytes -= len(_pageCache.pop(key))
+
+registerGauge("dreamrankr_page_cache_entries", "Rendered pages in the page cache", lambda: len(_pageCache))
+registerGauge("dreamrankr_page_cache_bytes", "Size of the rendered pages in the page cache", lambda: _pageCacheBytes)
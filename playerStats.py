@@ -1,5 +1,10 @@
 from db import db, Players, PlayerRankings
 from logger import log
+from rankingIndex import invalidatePointsPositions
+from rankingVersions import markRankingChanged, markPlayersChanged
+from leaderboard import recordLifetimeChange
+from ratings import applyRatingChange
+from metrics import incrementOnCommit
 from datetime import datetime, timezone
 
 def checkIfWinnerIsLower(winner, loser, rankingId):
@@ -39,6 +44,33 @@ def checkIfWinnerIsLower(winner, loser, rankingId):
         log(4, "checkIfWinnerIsLower", f"Error checking rankings: {e}")
         return False
 
+def swapRankingUp(playerRanking, otherPlayerRanking):
+    """
+    Swaps two loaded ranking entries, moving playerRanking to the position of otherPlayerRanking.
+    Updates both entries' ranking history and timestamps. Does not commit.
+    
+    Args:
+        playerRanking: PlayerRankings entry of the player moving up
+        otherPlayerRanking: PlayerRankings entry of the player moving down
+        
+    Returns:
+        None
+    """
+    currentRanking = playerRanking.ranking
+    newRanking = otherPlayerRanking.ranking
+    changedAt = datetime.now(timezone.utc)
+
+    # Update both players' ranking history before swapping
+    playerRanking.lastRanking = currentRanking
+    playerRanking.lastRankingChanged = changedAt
+    otherPlayerRanking.lastRanking = newRanking
+    otherPlayerRanking.lastRankingChanged = changedAt
+
+    # Perform the ranking swap
+    playerRanking.ranking = newRanking
+    otherPlayerRanking.ranking = currentRanking
+    incrementOnCommit("dreamrankr_ranking_swaps_total", (("ranking", str(playerRanking.rankingId)),))
+
 def rankPlayerUp(player, rankingId):
     """
     Moves a player up one position in the ranking by swapping with the next higher-ranked player.
@@ -81,17 +113,10 @@ def rankPlayerUp(player, rankingId):
                 f"Other player not found with ID: {otherPlayerRanking.playerId}")
             return
         
-        # Update both players' ranking history before swapping
-        playerRanking.lastRanking = currentRanking
-        playerRanking.lastRankingChanged = datetime.now(timezone.utc)
-        otherPlayerRanking.lastRanking = otherPlayerRanking.ranking
-        otherPlayerRanking.lastRankingChanged = datetime.now(timezone.utc)
-        
-        # Perform the ranking swap
-        playerRanking.ranking = newRanking
-        otherPlayerRanking.ranking = currentRanking
+        swapRankingUp(playerRanking, otherPlayerRanking)
         
         db.session.commit()
+        markRankingChanged(rankingId)
         
         log(1, "rankPlayerUp", 
             f"{player.name}({player.id}) moved up from {currentRanking} to {playerRanking.ranking}")
@@ -118,7 +143,7 @@ def getMatchesPlayed(player):
             return 0
             
         total_matches = (player.wins or 0) + (player.losses or 0)
-        log(1, "getMatchesPlayed", f"Player {getattr(player, 'name', 'Unknown')} has played {total_matches} matches")
+        log(1, "getMatchesPlayed", lambda: f"Player {getattr(player, 'name', 'Unknown')} has played {total_matches} matches")
         return total_matches
         
     except Exception as e:
@@ -147,6 +172,8 @@ def increaseWinsLosses(winner, loser):
             
         winner.wins = (winner.wins or 0) + 1
         loser.losses = (loser.losses or 0) + 1
+        recordLifetimeChange(winner)
+        recordLifetimeChange(loser)
         
         log(1, "increaseWinsLosses", 
             f"Updated stats - Winner {getattr(winner, 'name', 'Unknown')}: {winner.wins} wins, "
@@ -155,6 +182,24 @@ def increaseWinsLosses(winner, loser):
     except Exception as e:
         log(4, "increaseWinsLosses", f"Error updating win/loss stats: {e}")
 
+def addMatchPoints(playerRanking, won):
+    """
+    Adds the points of one match to a loaded ranking entry. Does not commit.
+    Awards 2 points for winning, 1 point for participating.
+    
+    Args:
+        playerRanking: PlayerRankings entry to update
+        won: Boolean indicating if the player won the match
+        
+    Returns:
+        tuple: (old points, new points)
+    """
+    points_to_add = 2 if won else 1
+    oldPoints = playerRanking.points or 0
+    playerRanking.lastPoints = oldPoints
+    playerRanking.points = oldPoints + points_to_add
+    return oldPoints, playerRanking.points
+
 def updatePoints(player, rankingId, won):
     """
     Updates a player's points in a specific ranking.
@@ -183,10 +228,8 @@ def updatePoints(player, rankingId, won):
             return
             
         # Award points based on match outcome
-        points_to_add = 2 if won else 1
-        oldPoints = playerRanking.points or 0
-        playerRanking.lastPoints = oldPoints
-        playerRanking.points = oldPoints + points_to_add
+        oldPoints, _ = addMatchPoints(playerRanking, won)
+        invalidatePointsPositions(rankingId)
         
         log(1, "updatePoints", 
             f"Player {getattr(player, 'name', 'Unknown')} points updated from {oldPoints} to {playerRanking.points} "
@@ -225,6 +268,7 @@ def changeSetStats(player, wonSets, lostSets):
         
         player.setsWon = old_sets_won + int(wonSets)
         player.setsLost = old_sets_lost + int(lostSets)
+        recordLifetimeChange(player)
         
         log(1, "changeSetStats", 
             f"Player {getattr(player, 'name', 'Unknown')} sets updated - "
@@ -236,10 +280,74 @@ def changeSetStats(player, wonSets, lostSets):
     except Exception as e:
         log(4, "changeSetStats", f"Error updating set stats: {e}")
 
+def applyMatchResult(winner, loser, winnerSetsWon, loserSetsWon, rankingId):
+    """
+    Computes every stat change of a finished match and applies it to the session without committing.
+    Both players' ranking entries are loaded with one query; only a rank up past a third
+    player needs one more lookup. The caller commits everything in one transaction.
+    A player removed from the ranking while the match was running has no ranking entry:
+    the swap, that player's points and the rating change are skipped, lifetime stats still count.
+    
+    Args:
+        winner: Player object of the match winner
+        loser: Player object of the match loser
+        winnerSetsWon: Number of sets won by winner (optional)
+        loserSetsWon: Number of sets won by loser (optional)
+        rankingId: ID of the ranking where the match took place
+        
+    Returns:
+        None
+    """
+    rankingEntries = PlayerRankings.query.filter(
+        PlayerRankings.rankingId == rankingId,
+        PlayerRankings.playerId.in_([winner.id, loser.id])
+    ).all()
+    entriesByPlayer = {entry.playerId: entry for entry in rankingEntries}
+    winnerRanking = entriesByPlayer.get(winner.id)
+    loserRanking = entriesByPlayer.get(loser.id)
+    if not winnerRanking or not loserRanking:
+        log(3, "applyMatchResult", f"Missing ranking data in ranking {rankingId} - Winner: {winnerRanking}, Loser: {loserRanking}")
+
+    # Lower ranking number = better position, the winner moves up one position if they were below the loser
+    if winnerRanking and loserRanking and winnerRanking.ranking > loserRanking.ranking:
+        newRanking = winnerRanking.ranking - 1
+        if loserRanking.ranking == newRanking:
+            otherPlayerRanking = loserRanking
+        else:
+            otherPlayerRanking = PlayerRankings.query.filter_by(ranking=newRanking, rankingId=rankingId).first()
+        if otherPlayerRanking:
+            oldRanking = winnerRanking.ranking
+            swapRankingUp(winnerRanking, otherPlayerRanking)
+            log(1, "applyMatchResult", 
+                f"{winner.name}({winner.id}) moved up from {oldRanking} to {winnerRanking.ranking}, "
+                f"player {otherPlayerRanking.playerId} moved down to {otherPlayerRanking.ranking}")
+        else:
+            log(3, "applyMatchResult", f"No player found at ranking {newRanking} in rankingId {rankingId}")
+
+    # Update win/loss records
+    increaseWinsLosses(winner, loser)
+
+    # Update points for both players
+    for player, playerRanking, won in ((winner, winnerRanking, True), (loser, loserRanking, False)):
+        if not playerRanking:
+            continue
+        oldPoints, newPoints = addMatchPoints(playerRanking, won)
+        log(1, "applyMatchResult", "Player {} points updated from {} to {} in ranking {} ({})",
+            player.name, oldPoints, newPoints, rankingId, 'won' if won else 'participated')
+
+    # Update ratings, kept in every ranking so it can be switched to sorting by rating
+    if winnerRanking and loserRanking:
+        applyRatingChange(winnerRanking, loserRanking)
+
+    # Update set statistics if provided
+    if winnerSetsWon is not None and loserSetsWon is not None:
+        changeSetStats(winner, winnerSetsWon, loserSetsWon)
+        changeSetStats(loser, loserSetsWon, winnerSetsWon)
+
 def changeStats(winnerId, loserId, winnerSetsWon, loserSetsWon, rankingId):
     """
     Comprehensive function to update all player statistics after a match.
-    Handles ranking changes, win/loss records, points, and set statistics.
+    Handles ranking changes, win/loss records, points, and set statistics in one commit.
     
     Args:
         winnerId: ID of the winning player
@@ -272,26 +380,12 @@ def changeStats(winnerId, loserId, winnerSetsWon, loserSetsWon, rankingId):
             
         log(1, "changeStats", f"Processing match result - Winner: {winner.name}, Loser: {loser.name}")
         
-        # Check if winner should move up in ranking
-        if checkIfWinnerIsLower(winner, loser, rankingId):
-            log(1, "changeStats", "Winner ranked lower than loser - initiating rank up")
-            rankPlayerUp(winner, rankingId)
-        
-        # Update win/loss records
-        increaseWinsLosses(winner, loser)
-        
-        # Update points for both players
-        updatePoints(winner, rankingId, won=True)
-        updatePoints(loser, rankingId, won=False)
-        
-        # Update set statistics if provided
-        if winnerSetsWon is not None and loserSetsWon is not None:
-            changeSetStats(winner, winnerSetsWon, loserSetsWon)
-            changeSetStats(loser, loserSetsWon, winnerSetsWon)
+        applyMatchResult(winner, loser, winnerSetsWon, loserSetsWon, rankingId)
         
         db.session.commit()
+        markPlayersChanged([winnerId, loserId], rankingId)
         log(1, "changeStats", f"Successfully updated all stats for match between {winner.name} and {loser.name}")
         
     except Exception as e:
         db.session.rollback()
-        log(4, "changeStats", f"Error updating match stats: {e}")
\ No newline at end of file
+        log(4, "changeStats", f"Error updating match stats: {e}")
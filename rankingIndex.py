@@ -0,0 +1,109 @@
+from db import db, PlayerRankings
+from logger import log
+import threading
+
+# =============================================================================
+# POINTS POSITION INDEX
+# =============================================================================
+# For rankings sorted by points the effective position of a player is not
+# stored in the database. Instead of sorting the whole ranking on every lookup,
+# the positions of a ranking are computed once with a single ordered query and
+# kept in memory until something that affects the order changes.
+#
+# Tie rule: players with equal points are ordered by their standard ranking
+# position (lower number first), then by player id. getPlayersOfRanking uses
+# the same order, so the shown table always matches the looked up positions.
+# Rankings sorted by rating are indexed the same way with the same tie rule.
+# A build that read the database before a concurrent commit must not store its
+# result after that commit invalidated the ranking: invalidation bumps a
+# generation counter, and a build only stores if the generation it read before
+# its query is still current (the same idea as the versions behind the ETags).
+
+_positions = {}  # rankingId -> (sortedBy, {playerId: position})
+_generations = {}  # rankingId -> number of invalidations of that ranking
+_globalGeneration = 0  # Number of invalidations of all rankings
+_positionsLock = threading.Lock()
+
+def getPointsOrder():
+    """
+    Returns the ORDER BY clauses used for points-sorted rankings, including the tie rule.
+    """
+    return (PlayerRankings.points.desc(), PlayerRankings.ranking.asc(), PlayerRankings.playerId.asc())
+
+def getRatingOrder():
+    """
+    Returns the ORDER BY clauses used for rating-sorted rankings, including the tie rule.
+    """
+    return (PlayerRankings.rating.desc(), PlayerRankings.ranking.asc(), PlayerRankings.playerId.asc())
+
+def buildPointsPositions(rankingId, sortedBy="points"):
+    """
+    Computes the points (or rating) positions of all players in a ranking with one query.
+
+    Args:
+        rankingId: ID of the ranking to index
+        sortedBy: "points" or "rating"
+
+    Returns:
+        dict: Mapping of playerId to 1-based position. Not cached if the ranking was invalidated meanwhile.
+    """
+    rankingId = int(rankingId)
+    with _positionsLock:
+        generation = (_globalGeneration, _generations.get(rankingId, 0))
+    orderColumns = getRatingOrder() if sortedBy == "rating" else getPointsOrder()
+    playerIds = db.session.query(PlayerRankings.playerId).filter(
+        PlayerRankings.rankingId == rankingId
+    ).order_by(*orderColumns).all()
+    positions = {row.playerId: index for index, row in enumerate(playerIds, start=1)}
+    with _positionsLock:
+        if generation == (_globalGeneration, _generations.get(rankingId, 0)):
+            _positions[rankingId] = (sortedBy, positions)
+    log(1, "buildPointsPositions", f"Indexed {len(positions)} {sortedBy} positions for ranking {rankingId}")
+    return positions
+
+def getPointsPosition(playerId, rankingId, sortedBy="points"):
+    """
+    Returns the effective position of a player in a points- or rating-sorted ranking.
+    Builds the index for the ranking on first use.
+
+    Args:
+        playerId: ID of the player
+        rankingId: ID of the ranking
+        sortedBy: "points" or "rating"
+
+    Returns:
+        int: Position of the player or None if the player is not in the ranking
+    """
+    with _positionsLock:
+        indexed = _positions.get(int(rankingId))
+    if indexed is None or indexed[0] != sortedBy:
+        positions = buildPointsPositions(rankingId, sortedBy)
+    else:
+        positions = indexed[1]
+    return positions.get(int(playerId))
+
+def invalidatePointsPositions(rankingId=None):
+    """
+    Drops the cached positions of a ranking, or of all rankings if no rankingId is given.
+    Must be called whenever points, ratings, membership or standard positions of a ranking change.
+
+    Args:
+        rankingId: ID of the ranking to invalidate (optional)
+
+    Returns:
+        None
+    """
+    global _globalGeneration
+    with _positionsLock:
+        if rankingId is None:
+            _globalGeneration += 1
+            _positions.clear()
+        else:
+            try:
+                rankingId = int(rankingId)
+            except (ValueError, TypeError):
+                _globalGeneration += 1
+                _positions.clear()
+                return
+            _generations[rankingId] = _generations.get(rankingId, 0) + 1
+            _positions.pop(rankingId, None)
@@ -0,0 +1,104 @@
+from db import db, PlayerRankings
+from rankingIndex import invalidatePointsPositions
+from live import publishStandings, getFollowedRankings
+from pageCache import invalidatePageCache
+from logger import log
+import datetime as dt
+import os
+import threading
+
+# =============================================================================
+# RANKING DATA VERSIONS
+# =============================================================================
+# Every mutating service calls markRankingChanged (or markPlayersChanged) after
+# its commit. That bumps an in-memory version counter per ranking plus a global
+# one, drops derived data like the points position index and cached pages and
+# pushes the new standings to live connections (live.py).
+# Pages derive ETags and Last-Modified from these versions, so unchanged pages
+# can be answered with 304 without touching the database or the templates.
+# The counters start over on every restart, BOOT_ID keeps old ETags from matching.
+
+BOOT_ID = os.urandom(4).hex()
+_bootTime = dt.datetime.now(dt.timezone.utc).replace(microsecond=0)
+_versions = {}                       # rankingId -> (version, lastModified)
+_epoch = (0, _bootTime)              # Bumped when every ranking changed at once
+_globalVersion = (0, _bootTime)      # Bumped by every change to any ranking
+_versionsLock = threading.Lock()
+
+def markRankingChanged(rankingId=None):
+    """
+    Records that the data of a ranking changed. Without a rankingId every ranking counts as changed.
+    Call after the change was committed.
+
+    Args:
+        rankingId: ID of the changed ranking (optional)
+
+    Returns:
+        None
+    """
+    global _globalVersion, _epoch
+    now = dt.datetime.now(dt.timezone.utc).replace(microsecond=0)
+    with _versionsLock:
+        _globalVersion = (_globalVersion[0] + 1, now)
+        if rankingId is None:
+            _epoch = (_epoch[0] + 1, now)
+        else:
+            try:
+                rankingId = int(rankingId)
+            except (ValueError, TypeError):
+                return
+            version = _versions.get(rankingId, (0, _bootTime))[0] + 1
+            _versions[rankingId] = (version, now)
+    invalidatePointsPositions(rankingId)
+    invalidatePageCache(rankingId)
+    if rankingId is None:
+        for followedId in getFollowedRankings():
+            publishStandings(followedId)
+    else:
+        publishStandings(rankingId)
+
+def markPlayersChanged(playerIds, rankingId=None):
+    """
+    Records a change to players, which shows up in every ranking they are part of
+    (e.g. lifetime wins or names). Looks up their rankings with one query.
+
+    Args:
+        playerIds: IDs of the changed players
+        rankingId: ID of a ranking that changed as well (optional)
+
+    Returns:
+        None
+    """
+    rankingIds = set()
+    if rankingId is not None:
+        rankingIds.add(int(rankingId))
+    try:
+        rows = db.session.query(PlayerRankings.rankingId).filter(
+            PlayerRankings.playerId.in_([int(playerId) for playerId in playerIds])
+        ).distinct().all()
+        rankingIds.update(row.rankingId for row in rows)
+    except Exception as e:
+        log(4, "markPlayersChanged", f"Could not find rankings of players {playerIds}, marking all rankings: {e}")
+        markRankingChanged()
+        return
+    if not rankingIds:
+        markRankingChanged()  # Players outside of rankings still show up on the home page
+        return
+    for changedRankingId in rankingIds:
+        markRankingChanged(changedRankingId)
+
+def getRankingVersion(rankingId):
+    """
+    Returns (version, lastModified) of a ranking, version is a string like "0.12".
+    """
+    with _versionsLock:
+        epoch = _epoch
+        version, lastModified = _versions.get(int(rankingId), (0, _bootTime))
+    return (f"{epoch[0]}.{version}", max(lastModified, epoch[1]))
+
+def getGlobalVersion():
+    """
+    Returns (version, lastModified) over all rankings.
+    """
+    with _versionsLock:
+        return _globalVersion
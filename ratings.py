@@ -0,0 +1,115 @@
+from db import db, PlayerRankings, FinishedMatches
+from logger import log
+import math
+import os
+
+# =============================================================================
+# GLICKO RATINGS
+# =============================================================================
+# Every ranking entry carries a Glicko-1 rating and rating deviation
+# (uncertainty), updated by applyMatchResult for every finished match in every
+# ranking, so switching a ranking to sortedBy "rating" works with the history
+# it already has. New entries start at the column defaults (1500 / 350).
+# The deviation shrinks with every match down to RATING_DEVIATION_MIN, which
+# keeps ratings of long-time players responsive.
+# replayRatings recomputes all ratings from FinishedMatches in memory and writes
+# them back with one bulk update, e.g. after changing RATING_DEVIATION_MIN.
+
+RATING_INITIAL = 1500.0
+RATING_DEVIATION_INITIAL = 350.0
+RATING_DEVIATION_MIN = float(os.environ.get('RATING_DEVIATION_MIN', 50))
+
+_Q = math.log(10) / 400
+
+def _g(deviation):
+    return 1 / math.sqrt(1 + 3 * _Q ** 2 * deviation ** 2 / math.pi ** 2)
+
+def updateRating(rating, deviation, opponentRating, opponentDeviation, score):
+    """
+    Computes the Glicko-1 update of one player after one match.
+
+    Args:
+        rating: Rating of the player before the match
+        deviation: Rating deviation of the player before the match
+        opponentRating: Rating of the opponent before the match
+        opponentDeviation: Rating deviation of the opponent before the match
+        score: 1 for a win, 0 for a loss
+
+    Returns:
+        tuple: (new rating, new deviation)
+    """
+    g = _g(opponentDeviation)
+    expected = 1 / (1 + 10 ** (-g * (rating - opponentRating) / 400))
+    dSquaredInverse = _Q ** 2 * g ** 2 * expected * (1 - expected)
+    precision = 1 / deviation ** 2 + dSquaredInverse
+    newRating = rating + _Q / precision * g * (score - expected)
+    newDeviation = max(math.sqrt(1 / precision), RATING_DEVIATION_MIN)
+    return newRating, newDeviation
+
+def applyRatingChange(winnerRanking, loserRanking):
+    """
+    Updates the ratings of both ranking entries of a finished match. Does not commit.
+
+    Args:
+        winnerRanking: PlayerRankings entry of the winner
+        loserRanking: PlayerRankings entry of the loser
+
+    Returns:
+        None
+    """
+    winnerRating = winnerRanking.rating if winnerRanking.rating is not None else RATING_INITIAL
+    winnerDeviation = winnerRanking.ratingDeviation or RATING_DEVIATION_INITIAL
+    loserRating = loserRanking.rating if loserRanking.rating is not None else RATING_INITIAL
+    loserDeviation = loserRanking.ratingDeviation or RATING_DEVIATION_INITIAL
+    winnerRanking.rating, winnerRanking.ratingDeviation = updateRating(winnerRating, winnerDeviation, loserRating, loserDeviation, 1)
+    loserRanking.rating, loserRanking.ratingDeviation = updateRating(loserRating, loserDeviation, winnerRating, winnerDeviation, 0)
+
+def replayRatings(rankingId=None):
+    """
+    Recomputes the ratings of a ranking, or of all rankings, from FinishedMatches.
+    The matches are streamed in the order they finished and replayed in memory,
+    the result is written with one bulk update instead of one ORM round trip per match.
+    Players that left a ranking still count as opponents in the replay.
+
+    Args:
+        rankingId: ID of the ranking to replay (optional)
+
+    Returns:
+        int: Number of replayed matches, None on error
+    """
+    try:
+        matches = db.session.query(
+            FinishedMatches.rankingId, FinishedMatches.winnerId, FinishedMatches.challengerId, FinishedMatches.defenderId
+        )
+        if rankingId is not None:
+            matches = matches.filter(FinishedMatches.rankingId == rankingId)
+        matches = matches.order_by(FinishedMatches.timeFinished.asc(), FinishedMatches.id.asc()).yield_per(5000)
+
+        ratings = {}  # (rankingId, playerId) -> (rating, deviation)
+        initial = (RATING_INITIAL, RATING_DEVIATION_INITIAL)
+        replayed = 0
+        for matchRankingId, winnerId, challengerId, defenderId in matches:
+            loserId = defenderId if winnerId == challengerId else challengerId
+            winner = ratings.get((matchRankingId, winnerId), initial)
+            loser = ratings.get((matchRankingId, loserId), initial)
+            ratings[(matchRankingId, winnerId)] = updateRating(winner[0], winner[1], loser[0], loser[1], 1)
+            ratings[(matchRankingId, loserId)] = updateRating(loser[0], loser[1], winner[0], winner[1], 0)
+            replayed += 1
+
+        entries = db.session.query(PlayerRankings.id, PlayerRankings.rankingId, PlayerRankings.playerId)
+        if rankingId is not None:
+            entries = entries.filter(PlayerRankings.rankingId == rankingId)
+        updates = []
+        for entryId, entryRankingId, playerId in entries:
+            rating, deviation = ratings.get((entryRankingId, playerId), initial)
+            updates.append({"id": entryId, "rating": rating, "ratingDeviation": deviation})
+        if updates:
+            db.session.execute(db.update(PlayerRankings), updates)
+        db.session.commit()
+        log(1, "replayRatings", f"Replayed {replayed} matches, updated {len(updates)} ratings" +
+            (f" of ranking {rankingId}" if rankingId is not None else ""))
+        return replayed
+    except Exception as e:
+        db.session.rollback()
+        log(4, "replayRatings", f"Could not replay ratings: {e}")
+        return None
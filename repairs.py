@@ -1,5 +1,6 @@
 from db import db, Players, PlayerRankings
 from logger import log
+from rankingVersions import markRankingChanged
 
 def checkForDeletedPlayers(rankingId):
     """
@@ -26,6 +27,7 @@ def checkForDeletedPlayers(rankingId):
                 continue  # Continue checking other entries
 
         db.session.commit()
+        markRankingChanged(rankingId)
         log(1, "checkForDeletedPlayers", f"Successfully checked and cleaned up deleted players in ranking ID {rankingId}")
         return True
 
@@ -66,6 +68,7 @@ def checkForGapInRanking(rankingId):
                 rankingEntryBefore = ranking.ranking
 
         db.session.commit()
+        markRankingChanged(rankingId)
         log(1, "checkForGapInRanking", f"Successfully checked and fixed gaps in ranking ID {rankingId}")
         return True
 
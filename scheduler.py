@@ -0,0 +1,165 @@
+from logger import log
+from metrics import registerGauge
+import datetime as dt
+import heapq
+import itertools
+import threading
+import time
+
+# =============================================================================
+# IN-PROCESS SCHEDULER
+# =============================================================================
+# Keeps a min-heap of upcoming deadlines and a single thread that sleeps until
+# the earliest one is due. Jobs are identified by a key; scheduling a key again
+# replaces its deadline (the old heap entry is skipped when it comes up).
+# Jobs run inside an app context, one after another, on the scheduler thread.
+
+_heap = []                 # (dueAt, sequence, key)
+_jobs = {}                 # key -> (dueAt, sequence, job, interval)
+_sequence = itertools.count()
+_condition = threading.Condition()
+_schedulerApp = None
+_schedulerThread = None
+_schedulerStop = threading.Event()
+
+def _toTimestamp(when):
+    """
+    Converts a datetime (naive values are treated as UTC) or a unix timestamp to a unix timestamp.
+    """
+    if isinstance(when, dt.datetime):
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=dt.timezone.utc)
+        return when.timestamp()
+    return float(when)
+
+def scheduleJob(key, when, job, interval=None):
+    """
+    Schedules job to run at the given time, replacing any job with the same key.
+
+    Args:
+        key: Hashable identifier of the job
+        when: datetime or unix timestamp of the first run
+        job: Callable without arguments, runs inside an app context
+        interval: Seconds between runs for repeating jobs (optional)
+
+    Returns:
+        None
+    """
+    dueAt = _toTimestamp(when)
+    with _condition:
+        sequence = next(_sequence)
+        _jobs[key] = (dueAt, sequence, job, interval)
+        heapq.heappush(_heap, (dueAt, sequence, key))
+        _condition.notify()
+
+def cancelJob(key):
+    """
+    Removes a scheduled job. Does nothing if the key is not scheduled.
+
+    Args:
+        key: Identifier the job was scheduled with
+
+    Returns:
+        None
+    """
+    with _condition:
+        if _jobs.pop(key, None) is not None:
+            _condition.notify()
+
+def getScheduledJobs():
+    """
+    Returns a dict of scheduled job keys and their due time as unix timestamp.
+    """
+    with _condition:
+        return {key: entry[0] for key, entry in _jobs.items()}
+
+def _nextDueJob():
+    """
+    Blocks until a job is due or the scheduler is stopped.
+    Returns (key, job) of the due job or None when stopping.
+    """
+    with _condition:
+        while not _schedulerStop.is_set():
+            # Drop heap entries whose job was cancelled or rescheduled
+            while _heap and _jobs.get(_heap[0][2], (None, None))[1] != _heap[0][1]:
+                heapq.heappop(_heap)
+            if not _heap:
+                _condition.wait()
+                continue
+            dueAt, sequence, key = _heap[0]
+            remaining = dueAt - time.time()
+            if remaining > 0:
+                _condition.wait(timeout=remaining)
+                continue
+            heapq.heappop(_heap)
+            _, _, job, interval = _jobs.pop(key)
+            if interval:
+                nextSequence = next(_sequence)
+                _jobs[key] = (dueAt + interval, nextSequence, job, interval)
+                heapq.heappush(_heap, (dueAt + interval, nextSequence, key))
+            return key, job
+    return None
+
+def _schedulerLoop():
+    """
+    Main loop of the scheduler thread.
+    """
+    from db import db
+    while True:
+        dueJob = _nextDueJob()
+        if dueJob is None:
+            return
+        key, job = dueJob
+        try:
+            with _schedulerApp.app_context():
+                try:
+                    job()
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            try:
+                with _schedulerApp.app_context():
+                    log(4, "scheduler", f"Scheduled job {key} failed: {e}")
+            except Exception:
+                print(f"ERROR: Scheduled job {key} failed: {e}")
+
+def isSchedulerRunning():
+    """
+    Returns True if the scheduler thread is alive.
+    """
+    return _schedulerThread is not None and _schedulerThread.is_alive()
+
+def startScheduler(app):
+    """
+    Starts the scheduler thread for the given Flask app.
+
+    Args:
+        app: Flask app whose context jobs run in
+
+    Returns:
+        None
+    """
+    global _schedulerApp, _schedulerThread
+    if isSchedulerRunning():
+        return
+    _schedulerApp = app
+    _schedulerStop.clear()
+    _schedulerThread = threading.Thread(target=_schedulerLoop, name="scheduler", daemon=True)
+    _schedulerThread.start()
+
+def stopScheduler():
+    """
+    Stops the scheduler thread. Scheduled jobs are kept and run after a restart.
+
+    Returns:
+        None
+    """
+    global _schedulerThread
+    with _condition:
+        _schedulerStop.set()
+        _condition.notify()
+    if _schedulerThread is not None:
+        _schedulerThread.join(timeout=5)
+        _schedulerThread = None
+
+registerGauge("dreamrankr_scheduled_jobs", "Jobs waiting in the scheduler", lambda: len(getScheduledJobs()))
@@ -1,9 +1,16 @@
 from db import db, PlayerRankings, Players, OnGoingMatches, PlayerBonuses, FinishedMatches, Rankings, LogEntries
 from repairs import checkForGapInRanking
-from playerStats import changeStats
-from logger import log
+from playerStats import applyMatchResult
+from logger import log, getLogEngine
+from rankingIndex import getPointsOrder, getRatingOrder, getPointsPosition
+from rankingVersions import markRankingChanged, markPlayersChanged
+from live import publishEvent
+from leaderboard import invalidateLeaderboard
+from headToHead import recordHeadToHead, deleteHeadToHead
+from metrics import incrementCounter
+from scheduler import scheduleJob, cancelJob
 import datetime as dt
-from functools import wraps
+import os
 from flask import flash
 
 class RankingObj:
@@ -13,6 +20,23 @@ class RankingObj:
         self.lastRanking = lastRanking
         self.lastRankingChanged = lastRankingChanged
 
+class RankedPlayer:
+    """
+    Compact row object for one player in one ranking.
+    Combines the lifetime stats of Players with the standing from PlayerRankings,
+    so templates can use it like a Players object with ranking and points set.
+    """
+    ROW_FIELDS = ("id", "name", "wins", "losses", "setsWon", "setsLost",
+                  "ranking", "points", "lastRanking", "lastPoints", "lastRankingChanged",
+                  "rating", "ratingDeviation")
+    __slots__ = ROW_FIELDS + ("bonus", "position")
+
+    def __init__(self, row, position=None):
+        for attribute in self.ROW_FIELDS:
+            setattr(self, attribute, getattr(row, attribute))
+        self.bonus = None
+        self.position = position
+
 def checkIfChangedAndUpdate(formId, player, playerArgument, argumentName, request):
     formArgument = request.form.get(formId)
     if formArgument and not formArgument == playerArgument:
@@ -20,6 +44,8 @@ def checkIfChangedAndUpdate(formId, player, playerArgument, argumentName, reques
         setattr(player, argumentName, formArgument)
         try:
             db.session.commit()
+            invalidateLeaderboard()
+            markPlayersChanged([player.id])
             # Log info for successful field update
             log(1, "player_edit", f"Changed {player.name}({player.id}) {argumentName} from {oldArgument} to {formArgument}")
         except Exception as e:
@@ -35,7 +61,7 @@ def setRankingAndPointsToObj(playerObj, rankingId):
         attributes = ["ranking", "points", "lastRanking", "lastRankingChanged"]
         for attribute in attributes:
             setattr(playerObj, attribute, getattr(rankingObj, attribute))
-        log(1, "setRankingAndPointsToObj", f"Set ranking and points for player {playerObj.id} in ranking {rankingId}")
+        log(1, "setRankingAndPointsToObj", "Set ranking and points for player {} in ranking {}", playerObj.id, rankingId)
     except Exception as e:
         log(4, "setRankingAndPointsToObj", f"Could not get and set Stats, because of {e}")
 
@@ -54,7 +80,7 @@ def getRankingAndPoints(playerId, rankingId):
             lastRanking = playerRankingObj.lastRanking,
             lastRankingChanged = playerRankingObj.lastRankingChanged
         )
-        log(1, "getRankingAndPoints", f"Fetched ranking and points for player {playerId} in ranking {rankingId}")
+        log(1, "getRankingAndPoints", "Fetched ranking and points for player {} in ranking {}", playerId, rankingId)
         return output
     except Exception as e:
         log(4, "getRankingAndPoints", f"Error fetching ranking and points for player {playerId} in ranking {rankingId}: {e}")
@@ -63,6 +89,10 @@ def getRankingAndPoints(playerId, rankingId):
 def getPlayersOfRanking(rankingId):
     """
     Returns all players in a ranking, ordered by their ranking.
+    Loads players and their ranking entries with a single query.
+
+    Returns:
+        list: RankedPlayer objects, empty list if an error occurs
     """
     try:
         ranking = db.session.get(Rankings, rankingId)
@@ -71,20 +101,35 @@ def getPlayersOfRanking(rankingId):
             return []
             
         if ranking.sortedBy == "points":
-            order_column = PlayerRankings.points.desc()  # Descending for points
+            order_columns = getPointsOrder()  # Descending for points, ties by ranking
+        elif ranking.sortedBy == "rating":
+            order_columns = getRatingOrder()  # Descending for rating, ties by ranking
         elif ranking.sortedBy == "standard":
-            order_column = PlayerRankings.ranking.asc()  # Ascending for ranking
+            order_columns = (PlayerRankings.ranking.asc(),)  # Ascending for ranking
         else:
             log(4, "getPlayersOfRanking", f"Invalid sorting option '{ranking.sortedBy}' for ranking {rankingId}")
             return []
 
-        players = db.session.query(Players).join(
+        # Select both tables' columns in one statement instead of one query per player
+        rows = db.session.query(
+            Players.id,
+            Players.name,
+            Players.wins,
+            Players.losses,
+            Players.setsWon,
+            Players.setsLost,
+            PlayerRankings.ranking,
+            PlayerRankings.points,
+            PlayerRankings.lastRanking,
+            PlayerRankings.lastPoints,
+            PlayerRankings.lastRankingChanged,
+            PlayerRankings.rating,
+            PlayerRankings.ratingDeviation
+        ).join(
             PlayerRankings, Players.id == PlayerRankings.playerId
-        ).filter(PlayerRankings.rankingId == rankingId).order_by(order_column).all()
-        
-        for player in players:
-            setRankingAndPointsToObj(player, rankingId)
-            
+        ).filter(PlayerRankings.rankingId == rankingId).order_by(*order_columns).all()
+        players = [RankedPlayer(row, position) for position, row in enumerate(rows, start=1)]
+
         log(1, "getPlayersOfRanking", f"Fetched players for ranking {rankingId}")
         return players
     except Exception as e:
@@ -94,6 +139,7 @@ def getPlayersOfRanking(rankingId):
 def getRankingOfPlayer(playerId, rankingId):
     """
     Retrieves the ranking of a player in a specific ranking.
+    For points- and rating-sorted rankings the position comes from the points position index.
 
     Args:
         playerId: ID of the player.
@@ -108,23 +154,18 @@ def getRankingOfPlayer(playerId, rankingId):
             log(3, "getRankingOfPlayer", f"Ranking with ID {rankingId} does not exist")
             return None
 
-        rankingEntry = getRankingAndPoints(playerId, rankingId)
-        if not rankingEntry:
-            log(3, "getRankingOfPlayer", f"No ranking entry found for player {playerId} in ranking {rankingId}")
-            return None
-
         if ranking.sortedBy == "standard":
+            rankingEntry = getRankingAndPoints(playerId, rankingId)
+            if rankingEntry.ranking is None:
+                log(3, "getRankingOfPlayer", f"No ranking entry found for player {playerId} in ranking {rankingId}")
+                return None
             log(1, "getRankingOfPlayer", f"Returning standard ranking for player {playerId} in ranking {rankingId}")
             return rankingEntry.ranking
-        elif ranking.sortedBy == "points":
-            allRankingEntries = getPlayersOfRanking(rankingId)
-            allRankingEntries.sort(key=lambda player: player.points, reverse=True)
-            for index, player in enumerate(allRankingEntries, start=1):
-                # Convert both to int to ensure proper comparison
-                if int(player.id) == int(playerId):
-                    return index
-            log(3, "getRankingOfPlayer", f"Player {playerId} not found in points-based ranking for ranking {rankingId}")
-            return None
+        elif ranking.sortedBy in ("points", "rating"):
+            position = getPointsPosition(playerId, rankingId, ranking.sortedBy)
+            if position is None:
+                log(3, "getRankingOfPlayer", f"Player {playerId} not found in {ranking.sortedBy}-based ranking for ranking {rankingId}")
+            return position
         else:
             log(4, "getRankingOfPlayer", f"Invalid sortedBy option '{ranking.sortedBy}' for ranking {rankingId}")
             return None
@@ -189,6 +230,8 @@ def newPlayer(name, rankingId, bonus, logicOperator, limitRanking):
             db.session.add(new_bonus)
             log(1, "newPlayer", f"Created bonus entry for player '{name}': {bonus} {logicOperator} {limitRanking}")
         db.session.commit()
+        invalidateLeaderboard()
+        markRankingChanged(rankingId or None)
         log(1, "newPlayer", f"Successfully created player '{name}' with all associated data")
     except Exception as e:
         db.session.rollback()
@@ -220,6 +263,7 @@ def addPlayerToRanking(playerId, rankingId):
         )
         db.session.add(new_ranking)
         db.session.commit()
+        markRankingChanged(rankingId)
         log(1, "addPlayerToRanking", f"Imported player {player.name}({playerId}) to ranking {rankingId}")
     except Exception as e:
         db.session.rollback()
@@ -248,6 +292,7 @@ def removePlayerFromRanking(playerId, rankingId):
     try:
         db.session.delete(playerRankingEntry)
         db.session.commit()
+        markRankingChanged(rankingId)
         checkForGapInRanking(rankingId)
         log(1, "removePlayerFromRanking", f"Removed player {playerId} from ranking {rankingId}")
     except Exception as e:
@@ -288,6 +333,7 @@ def deleteMatchesByPlayer(playerId):
             db.session.delete(match)
             
         db.session.commit()
+        markPlayersChanged([playerId])
         log(1, "deleteMatchesByPlayer", f"Successfully deleted {total_matches} ongoing matches for player {player.name}({playerId})")
         return True
         
@@ -311,10 +357,15 @@ def deletePlayer(playerId):
             log(3, "deletePlayer", f"Player with ID {playerId} does not exist")
             return
         deleteMatchesByPlayer(playerId)
+        deleteHeadToHead(playerId=playerId)
         db.session.delete(player)
         db.session.commit()
+        invalidateLeaderboard()
 
+        if not rankingIds:
+            markRankingChanged()
         for rankingId in rankingIds:
+            markRankingChanged(rankingId)
             checkForGapInRanking(rankingId)
         log(1, "deletePlayer", f"Deleted player {playerId} and their rankings")
     except Exception as e:
@@ -347,91 +398,210 @@ def startMatch(challengerId, defenderId, rankingId):
             new_match.defenderBonus = bonus.defender
         db.session.add(new_match)
         db.session.commit()
+        incrementCounter("dreamrankr_matches_started_total", (("ranking", str(rankingId)),))
+        markRankingChanged(rankingId)
+        publishEvent(rankingId, "matchStarted", {
+            "matchId": new_match.id, "challengerId": new_match.challengerId, "challenger": new_match.challenger,
+            "defenderId": new_match.defenderId, "defender": new_match.defender,
+            "challengerBonus": new_match.challengerBonus, "defenderBonus": new_match.defenderBonus,
+            "timeStarted": new_match.timeStarted.replace(tzinfo=dt.timezone.utc).timestamp()
+        })
         log(1, "startMatch", f"Starting match from {challenger.name}({challengerId}) against {defender.name}({defenderId})")
     except Exception as e:
         db.session.rollback()
         log(4, "startMatch", f"Couldnt start match from {challengerId} against {defenderId}, because of: {e}")
 
+def settleMatch(match, rankingId, winnerId, challengerScore, defenderScore):
+    """
+    Resolves the winner of an ongoing match, applies all stat changes, archives it as
+    finished and deletes the ongoing match. Everything is validated before anything
+    is changed. Flushes but does not commit.
+
+    Args:
+        match: OnGoingMatches object to finish
+        rankingId: ID of the ranking the match took place in
+        winnerId: ID of the winning player (ignored if both scores are given)
+        challengerScore: Sets won by challenger (optional)
+        defenderScore: Sets won by defender (optional)
+
+    Returns:
+        FinishedMatches: The archived match
+
+    Raises:
+        ValueError: If the result can not be resolved, nothing was changed in that case
+    """
+    challenger = db.session.get(Players, match.challengerId)
+    defender = db.session.get(Players, match.defenderId)
+    if not challenger or not defender:
+        raise ValueError(f"Challenger or defender does not exist for match {match.id}")
+
+    winner = None
+    winnerSetsWon = None
+    loserSetsWon = None
+
+    # Determine winner and scores
+    if challengerScore is not None and defenderScore is not None:
+        if challengerScore > defenderScore:
+            winner = challenger.name
+            winnerId = challenger.id
+            winnerSetsWon = challengerScore
+            loserSetsWon = defenderScore
+        elif defenderScore > challengerScore:
+            winner = defender.name
+            winnerId = defender.id
+            winnerSetsWon = defenderScore
+            loserSetsWon = challengerScore
+        else:
+            raise ValueError(f"Draw detected in match {match.id}, which is not supported")
+    else:
+        if not winnerId:
+            raise ValueError(f"No winnerId provided for match {match.id}")
+        winnerId = int(winnerId)
+        if winnerId == challenger.id:
+            winner = challenger.name
+        elif winnerId == defender.id:
+            winner = defender.name
+        else:
+            raise ValueError(f"WinnerId {winnerId} does not match challenger or defender in match {match.id}")
+
+    if not winner or not winnerId:
+        raise ValueError(f"Winner or WinnerId could not be resolved for match {match.id}")
+
+    new_finishedmatch = FinishedMatches(
+        rankingId = rankingId,
+        challenger = challenger.name,
+        challengerId = challenger.id,
+        defender = defender.name,
+        defenderId = defender.id,
+        timeStarted = match.timeStarted,
+        timeFinished = db.func.now(),
+        winner = winner,
+        winnerId = winnerId,
+        challengerScore = challengerScore if challengerScore is not None and defenderScore is not None else None,
+        defenderScore = defenderScore if challengerScore is not None and defenderScore is not None else None,
+    )
+
+    # Apply every stat change and archive the match in the same transaction
+    winnerPlayer, loserPlayer = (challenger, defender) if winnerId == challenger.id else (defender, challenger)
+    applyMatchResult(winnerPlayer, loserPlayer, winnerSetsWon, loserSetsWon, rankingId)
+    db.session.add(new_finishedmatch)
+    recordHeadToHead(new_finishedmatch)
+    db.session.delete(match)
+    db.session.flush()
+    return new_finishedmatch
+
+def getMatchFinishedEvent(matchId, finishedMatch):
+    """
+    Returns the payload of the live matchFinished event. matchId is the ID of the ongoing match.
+    """
+    return {
+        "matchId": int(matchId), "challengerId": finishedMatch.challengerId, "defenderId": finishedMatch.defenderId,
+        "winnerId": finishedMatch.winnerId, "winner": finishedMatch.winner,
+        "challengerScore": finishedMatch.challengerScore, "defenderScore": finishedMatch.defenderScore
+    }
+
 def endMatch(matchId, rankingId, winnerId, challengerScore, defenderScore):
     """
     Ends a match, records the result, updates stats, and moves the match to finished.
+    All changes are committed together, so a failure leaves the match untouched.
     """
     try:
         match = db.session.get(OnGoingMatches, matchId)
         if not match:
             log(3, "endMatch", f"Match with ID {matchId} does not exist")
             return
-        challenger = db.session.get(Players, match.challengerId)
-        defender = db.session.get(Players, match.defenderId)
-        if not challenger or not defender:
-            log(3, "endMatch", f"Challenger or defender does not exist for match {matchId}")
-            return
+        finishedMatch = settleMatch(match, rankingId, winnerId, challengerScore, defenderScore)
+        finishedMatchId = finishedMatch.id  # Read before commit expires the object
+        winnerId = finishedMatch.winnerId
+        playerIds = [finishedMatch.challengerId, finishedMatch.defenderId]
+        finishedEvent = getMatchFinishedEvent(matchId, finishedMatch)
+        db.session.commit()
+        incrementCounter("dreamrankr_matches_finished_total", (("ranking", str(rankingId)),))
+        publishEvent(rankingId, "matchFinished", finishedEvent)
+        markPlayersChanged(playerIds, rankingId)
+        log(1, "endMatch", f"Finished match with new id: {finishedMatchId}, winnerId: {winnerId}")
+        return
+    except ValueError as e:
+        db.session.rollback()
+        log(3, "endMatch", f"Could not finish match with id: {matchId}: {e}")
+        return
+    except Exception as e:
+        db.session.rollback()
+        log(4, "endMatch", f"Could not finish match with id: {matchId}, because of: {e}")
+        return
 
-        winner = None
-        loserId = None
-        winnerSetsWon = None
-        loserSetsWon = None
-
-        # Determine winner and scores
-        if challengerScore is not None and defenderScore is not None:
-            if challengerScore > defenderScore:
-                winner = challenger.name
-                winnerId = challenger.id
-                winnerSetsWon = challengerScore
-                loserSetsWon = defenderScore
-                loserId = defender.id
-            elif defenderScore > challengerScore:
-                winner = defender.name
-                winnerId = defender.id
-                winnerSetsWon = defenderScore
-                loserSetsWon = challengerScore
-                loserId = challenger.id
-            else:
-                log(3, "endMatch", f"Draw detected in match {matchId}, which is not supported")
-                return
-        else:
-            if not winnerId:
-                log(3, "endMatch", f"No winnerId provided for match {matchId}")
-                return
-            winnerId = int(winnerId)
-            if winnerId == challenger.id:
-                winner = challenger.name
-                loserId = defender.id
-            elif winnerId == defender.id:
-                winner = defender.name
-                loserId = challenger.id
-            else:
-                log(3, "endMatch", f"WinnerId {winnerId} does not match challenger or defender in match {matchId}")
-                return
+def endMatches(results, rankingId=None):
+    """
+    Finishes a batch of matches in one transaction with one commit.
+    Matches are settled in the order they were started (then by match id), so ranking
+    swaps happen in the order the matches were played, independent of the submitted order.
+    An invalid entry is skipped without changes, an unexpected error rolls back the whole batch.
 
-        if not winner or not winnerId:
-            log(3, "endMatch", f"Winner or WinnerId could not be resolved for match {matchId}")
-            return
+    Args:
+        results: List of dicts with match_id and either winner_id or challenger_score and defender_score
+        rankingId: Only accept matches of this ranking (optional)
 
-        new_finishedmatch = FinishedMatches(
-            rankingId = rankingId,
-            challenger = challenger.name,
-            challengerId = challenger.id,
-            defender = defender.name,
-            defenderId = defender.id,
-            timeStarted = match.timeStarted,
-            timeFinished = db.func.now(),
-            winner = winner,
-            winnerId = winnerId,
-            challengerScore = challengerScore if challengerScore is not None and defenderScore is not None else None,
-            defenderScore = defenderScore if challengerScore is not None and defenderScore is not None else None,
-        )
+    Returns:
+        list: One dict per submitted entry, in submitted order, with match_id, status and message
+    """
+    report = [{"match_id": entry.get("match_id") if isinstance(entry, dict) else None, "status": "error", "message": ""} for entry in results]
+    pending = []
+    seenMatchIds = set()
+    for index, entry in enumerate(results):
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError("Entry is not an object")
+            matchId = int(entry.get("match_id"))
+            if matchId in seenMatchIds:
+                raise ValueError(f"Match {matchId} is submitted more than once")
+            seenMatchIds.add(matchId)
+            match = db.session.get(OnGoingMatches, matchId)
+            if not match:
+                raise ValueError(f"Match with ID {matchId} does not exist")
+            if rankingId is not None and match.rankingId != int(rankingId):
+                raise ValueError(f"Match {matchId} does not belong to ranking {rankingId}")
+            challengerScore = entry.get("challenger_score")
+            defenderScore = entry.get("defender_score")
+            challengerScore = int(challengerScore) if challengerScore not in (None, "") else None
+            defenderScore = int(defenderScore) if defenderScore not in (None, "") else None
+            winnerId = entry.get("winner_id")
+            try:
+                winnerId = int(winnerId) if winnerId not in (None, "") else None
+            except (ValueError, TypeError):
+                raise ValueError(f"winner_id of match {matchId} must be an integer")
+            pending.append((match.timeStarted, match.id, index, match, winnerId, challengerScore, defenderScore))
+        except (ValueError, TypeError) as e:
+            report[index]["message"] = str(e)
 
-        changeStats(winnerId=winnerId, loserId=loserId, winnerSetsWon=winnerSetsWon, loserSetsWon=loserSetsWon, rankingId=rankingId)
-        db.session.add(new_finishedmatch)
-        db.session.delete(match)
+    pending.sort(key=lambda item: (item[0], item[1]))
+    changedPlayers = set()
+    finishedEvents = []
+    try:
+        for _, matchId, index, match, winnerId, challengerScore, defenderScore in pending:
+            try:
+                finishedMatch = settleMatch(match, match.rankingId, winnerId, challengerScore, defenderScore)
+                changedPlayers.update((finishedMatch.challengerId, finishedMatch.defenderId))
+                finishedEvents.append((finishedMatch.rankingId, getMatchFinishedEvent(matchId, finishedMatch)))
+                report[index].update(status="finished", message=f"Winner: {finishedMatch.winner}")
+            except (ValueError, TypeError) as e:
+                report[index]["message"] = str(e)
         db.session.commit()
-        log(1, "endMatch", f"Finished match with new id: {new_finishedmatch.id}, winnerId: {winnerId}")
-        return
     except Exception as e:
         db.session.rollback()
-        log(4, "endMatch", f"Could not finish match with id: {matchId}, because of: {e}")
-        return
+        log(4, "endMatches", f"Could not finish batch of {len(results)} matches, because of: {e}")
+        for item in report:
+            if item["status"] == "finished":
+                item.update(status="error", message="Batch was rolled back")
+        return report
+
+    for finishedRankingId, finishedEvent in finishedEvents:
+        incrementCounter("dreamrankr_matches_finished_total", (("ranking", str(finishedRankingId)),))
+        publishEvent(finishedRankingId, "matchFinished", finishedEvent)
+    if changedPlayers:
+        markPlayersChanged(changedPlayers)
+    finishedCount = sum(1 for item in report if item["status"] == "finished")
+    log(1, "endMatches", f"Finished {finishedCount} of {len(results)} submitted matches")
+    return report
 
 def updatePlayerRanking(playerId, rankingId, newRanking):
     """
@@ -446,6 +616,7 @@ def updatePlayerRanking(playerId, rankingId, newRanking):
         old_ranking = player_ranking_entry.ranking
         player_ranking_entry.ranking = int(newRanking)
         db.session.commit()
+        markRankingChanged(rankingId)
         
         player = db.session.get(Players, playerId)
         log(1, "updatePlayerRanking", f"Changed ranking for player {player.name}({player.id}) in ranking {rankingId} from {old_ranking} to {newRanking}")
@@ -499,9 +670,9 @@ def startList(name, description, startingPlayers, isTournament, typeOfTournament
             typeOfTournament = None
 
         if validateSortingOption(sortedBy) == False:
-            sortedBy = "ranking"
+            log(2, "startList", f"Invalid sorting option '{sortedBy}' provided. Defaulting to 'standard'.")
+            sortedBy = "standard"
             flash("Defined sorting setting is invalid. Falling back to the standard. You can change the sorting in the settings.", 'error')
-            log(2, "startList", f"Invalid sorting option '{sortedBy}' provided. Defaulting to 'ranking'.")
 
         # Ensure endsOn is a valid datetime object
         if endsOn and not isinstance(endsOn, dt.datetime):
@@ -544,6 +715,9 @@ def startList(name, description, startingPlayers, isTournament, typeOfTournament
                     flash(f"Failed to add player with ID {player} to the ranking list.", 'error')
 
         db.session.commit()
+        markRankingChanged(new_Ranking.id)
+        if endsOn:
+            scheduleRankingEnd(new_Ranking.id, endsOn)
         log(1, "startList", f"Successfully created new List: {name}")
         return True
     except Exception as e:
@@ -559,6 +733,9 @@ def endList(rankingId):
             ranking = db.session.get(Rankings, rankingId)
             ranking.ended = True
             db.session.commit()
+            markRankingChanged(rankingId)
+            publishEvent(rankingId, "rankingEnded")
+            scheduleRankingEnd(rankingId, None)
             log(1, "endList", f"Successfully ended ranking {rankingId}")
         except Exception as e:
             db.session.rollback()
@@ -573,7 +750,11 @@ def deleteList(rankingId):
             relatedRankingEntries = PlayerRankings.query.filter_by(rankingId=rankingId)
             for entry in relatedRankingEntries:
                 db.session.delete(entry)
+            deleteHeadToHead(rankingId=rankingId)
             db.session.commit()
+            publishEvent(rankingId, "reload")
+            markRankingChanged(rankingId)
+            scheduleRankingEnd(rankingId, None)
             log(1, "deleteList", f"Successfully deleted ranking {rankingId}")
         except Exception as e:
             db.session.rollback()
@@ -618,6 +799,8 @@ def changeEndingDate(rankingId, datetime_input):
         old_date = ranking.endsOn
         ranking.endsOn = datetime_input
         db.session.commit()
+        markRankingChanged(rankingId)
+        scheduleRankingEnd(rankingId, datetime_input)
         log(1, "changeEndingDate", f"Successfully changed ending date for ranking {rankingId} from {old_date} to {datetime_input}")
         return True
         
@@ -656,6 +839,7 @@ def changeSortingRanking(rankingId, setting):
         
         if changed:
             db.session.commit()
+            markRankingChanged(rankingId)
             log(1, "changeSortingRanking", f"Successfully changed sorting for ranking {rankingId} from '{old_setting}' to '{setting}'")
             return True
         else:
@@ -670,20 +854,17 @@ def changeSortingRanking(rankingId, setting):
     
 def clearLogs():
     """
-    Clears all log entries from the database.
+    Clears all log entries from the database with a single bulk delete.
     """
     try:
-        allLogs = LogEntries.query.all()
-        log_count = len(allLogs)
-        
+        result = db.session.execute(db.delete(LogEntries))
+        db.session.commit()
+        log_count = result.rowcount
+
         if log_count == 0:
             log(1, "clearLogs", "No logs found to clear")
             return True
-            
-        for log_entry in allLogs:
-            db.session.delete(log_entry)
-            
-        db.session.commit()
+
         log(1, "clearLogs", f"Successfully cleared {log_count} log entries")
         return True
         
@@ -691,7 +872,76 @@ def clearLogs():
         db.session.rollback()
         log(4, "clearLogs", f"Could not clear logs: {e}")
         return False
-    
+
+def deleteLogsInChunks(condition, chunkSize):
+    """
+    Deletes the log entries matching condition in batches of chunkSize rows.
+    Every batch is its own short transaction, so the log database is never locked for long.
+
+    Args:
+        condition: SQLAlchemy filter expression on LogEntries
+        chunkSize: Maximum rows deleted per transaction
+
+    Returns:
+        int: Number of deleted rows
+    """
+    engine = getLogEngine()
+    deleted = 0
+    while True:
+        chunk = db.select(LogEntries.id).where(condition).limit(chunkSize).scalar_subquery()
+        with engine.begin() as connection:
+            rowcount = connection.execute(db.delete(LogEntries).where(LogEntries.id.in_(chunk))).rowcount
+        deleted += rowcount
+        if rowcount < chunkSize:
+            return deleted
+
+def pruneLogs(retentionDays=None, maxRowsPerLevel=None, chunkSize=None):
+    """
+    Enforces the log retention policy: drops entries older than retentionDays and
+    keeps at most maxRowsPerLevel of the newest entries per level.
+    Unset arguments fall back to LOG_RETENTION_DAYS, LOG_MAX_ROWS_PER_LEVEL and
+    LOG_RETENTION_CHUNK; a value of 0 disables that rule. Both rules are off unless configured,
+    so upgrading never deletes existing entries (including Authentication audit records).
+
+    Returns:
+        int: Number of deleted rows, None if an error occurs
+    """
+    retentionDays = int(retentionDays if retentionDays is not None else os.environ.get('LOG_RETENTION_DAYS', 0))
+    maxRowsPerLevel = int(maxRowsPerLevel if maxRowsPerLevel is not None else os.environ.get('LOG_MAX_ROWS_PER_LEVEL', 0))
+    chunkSize = int(chunkSize or os.environ.get('LOG_RETENTION_CHUNK', 5000))
+    try:
+        deleted = 0
+        if retentionDays > 0:
+            cutoff = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=retentionDays)
+            deleted += deleteLogsInChunks(LogEntries.timestamp < cutoff, chunkSize)
+
+        if maxRowsPerLevel > 0:
+            with getLogEngine().connect() as connection:
+                levels = connection.execute(db.select(LogEntries.level).distinct()).scalars().all()
+                for level in levels:
+                    # Id of the newest entry that falls outside the cap, everything up to it goes
+                    lastKeptId = connection.execute(
+                        db.select(LogEntries.id).where(LogEntries.level == level)
+                        .order_by(LogEntries.id.desc()).offset(maxRowsPerLevel).limit(1)
+                    ).scalar()
+                    if lastKeptId is not None:
+                        deleted += deleteLogsInChunks((LogEntries.level == level) & (LogEntries.id <= lastKeptId), chunkSize)
+
+        if deleted:
+            log(1, "pruneLogs", f"Removed {deleted} log entries by retention policy")
+        return deleted
+    except Exception as e:
+        log(4, "pruneLogs", f"Could not enforce log retention: {e}")
+        return None
+
+def scheduleLogRetention():
+    """
+    Runs pruneLogs every LOG_RETENTION_INTERVAL seconds (default one hour) on the scheduler.
+    """
+    interval = int(os.environ.get('LOG_RETENTION_INTERVAL', 3600))
+    if interval > 0:
+        scheduleJob("logRetention", dt.datetime.now(dt.timezone.utc) + dt.timedelta(seconds=60), pruneLogs, interval=interval)
+
 def checkIfRankingEnded(rankingId):
     """
     Checks if a ranking has ended based on its end date and updates the status accordingly.
@@ -729,6 +979,9 @@ def checkIfRankingEnded(rankingId):
             old_status = ranking.ended
             ranking.ended = True
             db.session.commit()
+            incrementCounter("dreamrankr_rankings_ended_total")
+            markRankingChanged(rankingId)
+            publishEvent(rankingId, "rankingEnded")
             log(1, "checkIfRankingEnded", f"Ranking {rankingId} has ended. Status changed from {old_status} to {ranking.ended}")
             return True
         elif ranking.endsOn > current_time:
@@ -749,15 +1002,77 @@ def checkAllRankings():
         if ranking.endsOn:
             checkIfRankingEnded(ranking.id)
 
-def checkBeforeRendering(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        checkAllRankings()
-        return f(*args, **kwargs)
-    return decorated_function
+RANKING_END_RETRY_MIN = 5       # Seconds before the first retry of a failed ranking end
+RANKING_END_RETRY_MAX = 300     # Upper bound of the doubling retry delay
+_rankingEndFailures = {}        # rankingId -> failed attempts in a row
+
+def endRankingWhenDue(rankingId):
+    """
+    Scheduler job that marks a ranking as ended once its end date is reached.
+    Re-arms itself at the new end date if it was moved into the future. If the end date
+    has passed but the ranking could not be ended (e.g. locked database), it retries with
+    a doubling delay between RANKING_END_RETRY_MIN and RANKING_END_RETRY_MAX seconds.
+
+    Args:
+        rankingId: ID of the ranking to check
+    """
+    if checkIfRankingEnded(rankingId):
+        _rankingEndFailures.pop(rankingId, None)
+        return
+    now = dt.datetime.now(dt.timezone.utc)
+    try:
+        ranking = db.session.get(Rankings, rankingId)
+        if not ranking or not ranking.endsOn or ranking.ended:
+            _rankingEndFailures.pop(rankingId, None)
+            return
+        endsOn = ranking.endsOn if ranking.endsOn.tzinfo else ranking.endsOn.replace(tzinfo=dt.timezone.utc)
+    except Exception as e:
+        db.session.rollback()
+        log(4, "endRankingWhenDue", f"Could not load ranking {rankingId}: {e}")
+        endsOn = None
+    if endsOn and endsOn > now:
+        _rankingEndFailures.pop(rankingId, None)
+        scheduleRankingEnd(rankingId, endsOn)
+        return
+    failures = _rankingEndFailures.get(rankingId, 0) + 1
+    _rankingEndFailures[rankingId] = failures
+    delay = min(RANKING_END_RETRY_MIN * 2 ** min(failures - 1, 16), RANKING_END_RETRY_MAX)
+    log(3, "endRankingWhenDue", f"Could not end ranking {rankingId} (attempt {failures}), retrying in {delay}s")
+    scheduleRankingEnd(rankingId, now + dt.timedelta(seconds=delay))
+
+def scheduleRankingEnd(rankingId, endsOn):
+    """
+    Arms the scheduler to end a ranking exactly at its end date.
+    Replaces a previously scheduled end date, or cancels it if endsOn is None.
+
+    Args:
+        rankingId: ID of the ranking
+        endsOn: New end date (timezone-naive values are treated as UTC) or None
+    """
+    key = ("rankingEnd", int(rankingId))
+    if not endsOn:
+        cancelJob(key)
+        _rankingEndFailures.pop(int(rankingId), None)
+        log(1, "scheduleRankingEnd", f"Cancelled scheduled end of ranking {rankingId}")
+        return
+    scheduleJob(key, endsOn, lambda: endRankingWhenDue(int(rankingId)))
+    log(1, "scheduleRankingEnd", f"Scheduled end of ranking {rankingId} at {endsOn}")
+
+def scheduleAllRankingEnds():
+    """
+    Schedules the end dates of all running rankings. Used at startup.
+    Rankings whose end date already passed are ended on the next scheduler tick.
+    """
+    try:
+        runningRankings = Rankings.query.filter(Rankings.endsOn.isnot(None), Rankings.ended == False).all()
+        for ranking in runningRankings:
+            scheduleRankingEnd(ranking.id, ranking.endsOn)
+        log(1, "scheduleAllRankingEnds", f"Scheduled end dates of {len(runningRankings)} rankings")
+    except Exception as e:
+        log(4, "scheduleAllRankingEnds", f"Could not schedule ranking end dates: {e}")
 
 def validateSortingOption(str):
-    OPTIONS = ["standard", "points"]
+    OPTIONS = ["standard", "points", "rating"]
     output = False
     for option in OPTIONS:
         if str == option:
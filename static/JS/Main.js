@@ -1029,6 +1029,156 @@ function initializeDeleteRemovePlayerModal() {
   }
 }
 
+/**
+ * Reloads the page once no modal or offcanvas is open, so open forms are not lost
+ */
+function reloadWhenIdle() {
+  const open = document.querySelector(".modal.show, .offcanvas.show");
+  if (!open) {
+    window.location.reload();
+    return;
+  }
+  open.addEventListener(
+    open.classList.contains("modal") ? "hidden.bs.modal" : "hidden.bs.offcanvas",
+    () => reloadWhenIdle(),
+    { once: true }
+  );
+}
+
+/**
+ * Applies a standings event to the player cards (viewer) or player rows (trainer):
+ * updates the shown numbers and moves the entries into the new order.
+ * Reloads the page if players were added or removed.
+ * @param {HTMLElement} container - Element with the data-live-ranking attribute
+ * @param {Array} standings - Players in display order as sent by the server
+ */
+function applyStandings(container, standings) {
+  const entries = new Map();
+  container.querySelectorAll(":scope > [data-player-id]").forEach((entry) => {
+    entries.set(entry.getAttribute("data-player-id"), entry);
+  });
+  if (
+    entries.size !== standings.length ||
+    standings.some((player) => !entries.has(String(player.id)))
+  ) {
+    reloadWhenIdle();
+    return;
+  }
+
+  const sortedBy = container.getAttribute("data-sorted-by");
+  standings.forEach((player, index) => {
+    const entry = entries.get(String(player.id));
+    const games = player.wins + player.losses;
+    const values = {
+      position: sortedBy === "standard" ? player.ranking : player.position,
+      points: player.points,
+      wins: player.wins,
+      losses: player.losses,
+      setsWon: player.setsWon,
+      setsLost: player.setsLost,
+      rating: Math.round(player.rating),
+      ratingDeviation: Math.round(player.ratingDeviation),
+      winRate:
+        player.wins && games > 0
+          ? `${Math.round((player.wins / games) * 100)}%`
+          : "N/A",
+    };
+    entry.querySelectorAll("[data-field]").forEach((field) => {
+      const value = values[field.getAttribute("data-field")];
+      if (value !== undefined && field.textContent.trim() !== String(value)) {
+        field.textContent = value;
+      }
+    });
+
+    // Keep the data of the edit button in sync (trainer page)
+    const editButton = entry.querySelector(".edit-btn");
+    if (editButton) {
+      editButton.dataset.playerRanking = player.ranking;
+      editButton.dataset.playerWins = player.wins;
+      editButton.dataset.playerLosses = player.losses;
+      editButton.dataset.playerSetsWon = player.setsWon;
+      editButton.dataset.playerSetsLost = player.setsLost;
+    }
+
+    // Medals of the top three (viewer page)
+    const badge = entry.querySelector(".position-badge");
+    if (badge) {
+      let icon = badge.querySelector(".position-icon");
+      if (index < 3) {
+        if (!icon) {
+          icon = document.createElement("div");
+          icon.className = "position-icon";
+          badge.appendChild(icon);
+        }
+        icon.textContent = ["🥇", "🥈", "🥉"][index];
+      } else if (icon) {
+        icon.remove();
+      }
+    }
+
+    container.appendChild(entry); // Moves the entry to the end, leaving all entries in standings order
+  });
+}
+
+/**
+ * Removes a finished or cancelled match from the active matches (trainer page)
+ * @param {number} matchId - ID of the ongoing match
+ */
+function removeActiveMatch(matchId) {
+  const button = document.querySelector(
+    `.activeMatches [data-match-id="${matchId}"]`
+  );
+  if (!button) return;
+  const item = button.closest(".carousel-item");
+  const carousel = document.getElementById("activeMatchesCarousel");
+  if (!item || !carousel || carousel.querySelectorAll(".carousel-item").length <= 1) {
+    reloadWhenIdle();
+    return;
+  }
+  const wasActive = item.classList.contains("active");
+  item.remove();
+  if (wasActive) {
+    carousel.querySelector(".carousel-item").classList.add("active");
+  }
+}
+
+/**
+ * Follows the live feed of the shown ranking with Server-Sent Events and updates
+ * the page in place instead of reloading it. See live.py for the events.
+ */
+function initializeLiveFeed() {
+  const container = document.querySelector("[data-live-ranking]");
+  if (!container || !window.EventSource) return;
+
+  const rankingId = container.getAttribute("data-live-ranking");
+  const source = new EventSource(`/live/${rankingId}`);
+
+  source.addEventListener("standings", (event) => {
+    applyStandings(container, JSON.parse(event.data).players);
+  });
+
+  source.addEventListener("matchStarted", (event) => {
+    const match = JSON.parse(event.data);
+    if (document.querySelector(".activeMatches")) {
+      showToast(`Match started: ${match.challenger} vs ${match.defender}`);
+      reloadWhenIdle();
+    }
+  });
+
+  source.addEventListener("matchFinished", (event) => {
+    const match = JSON.parse(event.data);
+    if (!match.cancelled) {
+      showToast(`Match finished, winner: ${match.winner}`, "success");
+    }
+    removeActiveMatch(match.matchId);
+  });
+
+  source.addEventListener("rankingEnded", () => reloadWhenIdle());
+  source.addEventListener("reload", () => reloadWhenIdle());
+
+  window.addEventListener("beforeunload", () => source.close());
+}
+
 // Initialize all functionality when DOM is fully loaded
 document.addEventListener("DOMContentLoaded", function () {
   // Set up click handlers for player table rows
@@ -1049,6 +1199,7 @@ document.addEventListener("DOMContentLoaded", function () {
   initializeAddPlayerForm();
   initializeAddPlayerOffcanvasUI();
   initializeDeleteRemovePlayerModal();
+  initializeLiveFeed();
 
   // Initialize Bootstrap tooltips if any exist
   const tooltipTriggerList = [].slice.call(
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app.py reads its configuration on import, point it at throwaway databases first
+_databaseDir = tempfile.mkdtemp(prefix="dreamrankr-tests-")
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_databaseDir, 'Main.db')}"
+os.environ['LOG_DATABASE_URL'] = f"sqlite:///{os.path.join(_databaseDir, 'Logs.db')}"
+os.environ.setdefault('LOCAL_TIMEZONE', 'UTC')
+os.environ.setdefault('SECRET_KEY', 'tests')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flaskApp
+from db import db, Authentication, Players, Rankings, PlayerRankings
+from werkzeug.security import generate_password_hash
+
+TRAINER_PASSWORD = "trainer"
+
+@pytest.fixture
+def app():
+    """
+    App with an empty ranking database, a trainer login and one standard ranking of four players.
+    """
+    flaskApp.config['TESTING'] = True
+    with flaskApp.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+        db.session.add(Authentication(name="trainer", passwordHash=generate_password_hash(TRAINER_PASSWORD)))
+        ranking = Rankings(name="Test")
+        db.session.add(ranking)
+        for name in ("Alice", "Bob", "Charlie", "Dan"):
+            db.session.add(Players(name=name, wins=0, losses=0, setsWon=0, setsLost=0))
+        db.session.commit()
+        for position, player in enumerate(Players.query.order_by(Players.id), start=1):
+            db.session.add(PlayerRankings(playerId=player.id, rankingId=ranking.id, ranking=position, points=0))
+        db.session.commit()
+        yield flaskApp
+        db.session.remove()
+
+@pytest.fixture
+def trainerClient(app):
+    client = app.test_client()
+    client.post('/login', data={'password': TRAINER_PASSWORD})
+    client.get('/')  # Consumes the login flash
+    return client
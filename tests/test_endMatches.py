@@ -0,0 +1,38 @@
+from db import db, OnGoingMatches, FinishedMatches
+from services import startMatch
+
+def startMatches(app):
+    with app.app_context():
+        startMatch(2, 1, 1)
+        startMatch(4, 3, 1)
+        return [match.id for match in OnGoingMatches.query.order_by(OnGoingMatches.id)]
+
+def test_malformed_winner_does_not_roll_back_valid_entries(app, trainerClient):
+    validId, malformedId = startMatches(app)
+
+    response = trainerClient.post('/trainer/finish_matches', json={"results": [
+        {"match_id": validId, "winner_id": 2},
+        {"match_id": malformedId, "winner_id": [1]},
+    ]})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["finished"] == 1
+    assert body["results"][0]["status"] == "finished"
+    assert body["results"][1]["status"] == "error"
+    assert "winner_id" in body["results"][1]["message"]
+    with app.app_context():
+        assert [match.id for match in OnGoingMatches.query] == [malformedId]
+        assert FinishedMatches.query.count() == 1
+
+def test_winner_outside_of_match_is_reported_per_entry(app, trainerClient):
+    validId, otherId = startMatches(app)
+
+    response = trainerClient.post('/trainer/finish_matches', json={"results": [
+        {"match_id": validId, "challenger_score": 3, "defender_score": 1},
+        {"match_id": otherId, "winner_id": 1},
+    ]})
+
+    body = response.get_json()
+    assert body["finished"] == 1
+    assert "does not match" in body["results"][1]["message"]